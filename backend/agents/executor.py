@@ -1,18 +1,92 @@
 from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
 from datetime import datetime
-import json
-from openai import OpenAI
+import asyncio
+import itertools
+import re
+import threading
+import time
+from openai import OpenAI, AsyncOpenAI
+
+from agents.semantic_cache import SemanticResponseCache
+from jsonio import loads as _loads
+
+# Matches numbered ("12.") and bulleted ("-", "•", "*") checklist lines
+_CHECKLIST_RE = re.compile(r'^\s*(?:\d+\.|[-•*])\s*(.+?)\s*$', re.MULTILINE)
+
+# Extracts the JSON object from batch-summary replies that wrap it in
+# prose or code fences (no json response_format on base gpt-4)
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Salvages complete {"i": n, "summary": "..."} entries out of a batch
+# reply whose JSON is malformed or truncated mid-array
+_SUMMARY_ITEM_RE = re.compile(
+    r'\{\s*"i"\s*:\s*(\d+)\s*,\s*"summary"\s*:\s*"((?:[^"\\]|\\.)*)"\s*\}'
+)
+
+
+@dataclass(slots=True)
+class ExecResult:
+    """Execution result wrapper.
+
+    Slots keep the per-call wrapper allocation small (no __dict__) on the
+    hot execute path; to_dict() reproduces the previous dict shape at the
+    serialization boundary.
+    """
+    success: bool
+    action: str
+    result: Any
+    timestamp: str
+    parameters: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for the API boundary (same shape as the old dict)."""
+        data = {
+            "success": self.success,
+            "action": self.action,
+            "result": self.result,
+            "timestamp": self.timestamp
+        }
+        if self.parameters is not None:
+            data["parameters"] = self.parameters
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access kept for callers that treat results as mappings."""
+        return getattr(self, key, default)
 
 
 class ExecutorAgent:
     """Agent responsible for executing actions based on plan steps."""
-    
-    def __init__(self, client: OpenAI):
+
+    def __init__(self, client: OpenAI, async_client: Optional[AsyncOpenAI] = None,
+                 max_parallel: int = 4,
+                 response_cache: Optional[SemanticResponseCache] = None):
         self.client = client
+        # Async client for concurrent execution of independent steps
+        self.async_client = async_client or AsyncOpenAI(api_key=client.api_key)
+        # Semantic cache so repeated/paraphrased content skips the API
+        # call; it shares the async client so async lookups don't block
+        # the event loop on sync embedding calls
+        self.response_cache = response_cache or SemanticResponseCache(
+            client, async_client=self.async_client
+        )
         self.agent_name = "Executor"
         self.tasks = []  # In-memory task storage
         self.reports = []  # In-memory report storage
-        
+
+        # Monotonic ID sequences stay collision-free under concurrent
+        # execution, unlike len(self.tasks) + 1
+        self._task_seq = itertools.count(1)
+        self._report_seq = itertools.count(1)
+        self._state_lock = threading.Lock()
+
+        # Bound concurrent OpenAI calls to respect rate limits
+        self._llm_semaphore = asyncio.Semaphore(max_parallel)
+
         # Available actions
         self.available_actions = {
             "create_task": self.create_task,
@@ -21,43 +95,339 @@ class ExecutorAgent:
             "create_checklist": self.create_checklist,
             "analyze_content": self.analyze_content
         }
+
+        # Async variants used by execute_async/execute_batch
+        self.available_async_actions = {
+            "create_task": self._create_task_async,
+            "summarize": self._summarize_async,
+            "generate_report": self._generate_report_async,
+            "create_checklist": self._create_checklist_async,
+            "analyze_content": self._analyze_content_async
+        }
     
-    def execute(self, action: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    def execute(self, action: str, parameters: Dict[str, Any]) -> ExecResult:
         """Execute a specific action with given parameters."""
-        
+
+        # Format the timestamp once per call instead of per return branch
+        timestamp = datetime.now().isoformat()
+
         if action not in self.available_actions:
-            return {
-                "success": False,
-                "action": action,
-                "error": f"Unknown action: {action}. Available: {list(self.available_actions.keys())}",
-                "result": None
-            }
-        
+            return ExecResult(
+                success=False,
+                action=action,
+                error=f"Unknown action: {action}. Available: {list(self.available_actions.keys())}",
+                result=None,
+                timestamp=timestamp
+            )
+
         try:
             result = self.available_actions[action](**parameters)
-            return {
-                "success": True,
-                "action": action,
-                "parameters": parameters,
-                "result": result,
-                "timestamp": datetime.now().isoformat()
-            }
+            return ExecResult(
+                success=True,
+                action=action,
+                parameters=parameters,
+                result=result,
+                timestamp=timestamp
+            )
         except Exception as e:
-            return {
-                "success": False,
-                "action": action,
-                "parameters": parameters,
-                "error": f"Execution failed: {str(e)}",
-                "result": None,
-                "timestamp": datetime.now().isoformat()
-            }
+            return ExecResult(
+                success=False,
+                action=action,
+                parameters=parameters,
+                error=f"Execution failed: {str(e)}",
+                result=None,
+                timestamp=timestamp
+            )
     
-    def create_task(self, title: str, description: str = "", 
+    async def execute_async(self, action: str, parameters: Dict[str, Any]) -> ExecResult:
+        """Async mirror of execute, dispatching to the async action variants."""
+
+        timestamp = datetime.now().isoformat()
+
+        if action not in self.available_async_actions:
+            return ExecResult(
+                success=False,
+                action=action,
+                error=f"Unknown action: {action}. Available: {list(self.available_async_actions.keys())}",
+                result=None,
+                timestamp=timestamp
+            )
+
+        try:
+            result = await self.available_async_actions[action](**parameters)
+            return ExecResult(
+                success=True,
+                action=action,
+                parameters=parameters,
+                result=result,
+                timestamp=timestamp
+            )
+        except Exception as e:
+            return ExecResult(
+                success=False,
+                action=action,
+                parameters=parameters,
+                error=f"Execution failed: {str(e)}",
+                result=None,
+                timestamp=timestamp
+            )
+
+    async def execute_batch(self, calls: List[tuple]) -> List[ExecResult]:
+        """Execute independent (action, parameters) calls concurrently.
+
+        Since each LLM call is I/O-bound, fanning them out with asyncio.gather
+        makes total latency roughly the slowest call instead of the sum.
+        Summarize calls sharing a max_length are folded into one batched
+        OpenAI request each to amortize per-request overhead.
+        """
+        results: List[Any] = [None] * len(calls)
+
+        # Group summarize calls by max_length so batching never flattens a
+        # task's own limit onto the others; singleton groups aren't worth
+        # a batched request and run like any other call
+        summary_groups: Dict[int, List[int]] = {}
+        for i, (action, parameters) in enumerate(calls):
+            if action == "summarize":
+                summary_groups.setdefault(
+                    parameters.get("max_length", 200), []
+                ).append(i)
+        summary_groups = {
+            max_length: indices
+            for max_length, indices in summary_groups.items()
+            if len(indices) >= 2
+        }
+        batched = {i for indices in summary_groups.values() for i in indices}
+        other_indices = [i for i in range(len(calls)) if i not in batched]
+
+        async def run_others():
+            if not other_indices:
+                return []
+            return await asyncio.gather(
+                *[self.execute_async(*calls[i]) for i in other_indices],
+                return_exceptions=True
+            )
+
+        async def run_summary_group(max_length: int, indices: List[int]):
+            contents = [calls[i][1].get("content", "") for i in indices]
+            return await self._summarize_batch_async(contents, max_length=max_length)
+
+        other_results, *group_results = await asyncio.gather(
+            run_others(),
+            *(run_summary_group(max_length, indices)
+              for max_length, indices in summary_groups.items())
+        )
+
+        timestamp = datetime.now().isoformat()
+        for i, result in zip(other_indices, other_results):
+            if isinstance(result, BaseException):
+                # Callers expect ExecResults, never raw exceptions
+                result = ExecResult(
+                    success=False,
+                    action=calls[i][0],
+                    parameters=calls[i][1],
+                    error=f"Execution failed: {str(result)}",
+                    result=None,
+                    timestamp=timestamp
+                )
+            results[i] = result
+        for indices, summary_results in zip(summary_groups.values(), group_results):
+            for i, result in zip(indices, summary_results):
+                results[i] = ExecResult(
+                    success="error" not in result,
+                    action="summarize",
+                    parameters=calls[i][1],
+                    result=result,
+                    timestamp=timestamp
+                )
+
+        return results
+
+    def summarize_batch(self, contents: List[str], max_length: int = 200) -> List[Dict[str, Any]]:
+        """Summarize several documents in a single OpenAI request.
+
+        Composes one prompt with numbered documents and asks for a JSON array
+        of summaries, amortizing the HTTP round-trip and the shared system
+        prompt across all items.
+        """
+        if not contents:
+            return []
+        if len(contents) == 1:
+            return [self.summarize(contents[0], max_length=max_length)]
+
+        prompt = self._build_batch_summarize_prompt(contents, max_length)
+
+        try:
+            response = self.client.chat.completions.create(
+                model="gpt-4",
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant that creates clear, concise summaries."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                max_tokens=max_length * 2 * len(contents)
+            )
+            return self._parse_batch_summaries(
+                response.choices[0].message.content, contents
+            )
+        except Exception as e:
+            return [
+                {
+                    "summary": f"Error generating summary: {str(e)}",
+                    "error": str(e),
+                    "message": "❌ Failed to generate summary"
+                }
+                for _ in contents
+            ]
+
+    # Per-item output token allowance by length bin; short documents get a
+    # tight budget so their bin's decode finishes quickly
+    _BIN_TOKEN_BUDGET = {0: 100, 1: 400, 2: 800}
+
+    @staticmethod
+    def _length_bin(content_length: int) -> int:
+        """Bin index by content length: <500, 500-2000, 2000+ chars."""
+        if content_length < 500:
+            return 0
+        if content_length < 2000:
+            return 1
+        return 2
+
+    async def _summarize_batch_async(self, contents: List[str],
+                                     max_length: int = 200) -> List[Dict[str, Any]]:
+        """Async variant of summarize_batch using the AsyncOpenAI client.
+
+        Larger batches are split into length bins dispatched concurrently,
+        so short documents aren't stuck waiting on the longest one
+        (head-of-line blocking).
+        """
+        if not contents:
+            return []
+        if len(contents) == 1:
+            return [await self._summarize_async(contents[0], max_length=max_length)]
+        if len(contents) <= 2:
+            # Too few items for binning to pay off
+            return await self._summarize_batch_request(contents, max_length)
+
+        bins: Dict[int, List[int]] = {}
+        for index, content in enumerate(contents):
+            bins.setdefault(self._length_bin(len(content)), []).append(index)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(contents)
+
+        async def run_bin(bin_id: int, indices: List[int]):
+            bin_results = await self._summarize_batch_request(
+                [contents[i] for i in indices], max_length,
+                # The bin budget trims long-bin decode time but must never
+                # undercut what the caller's max_length needs, or short
+                # bins truncate mid-JSON
+                per_item_tokens=max(self._BIN_TOKEN_BUDGET[bin_id],
+                                    max_length * 2)
+            )
+            for i, result in zip(indices, bin_results):
+                results[i] = result
+
+        await asyncio.gather(
+            *(run_bin(bin_id, indices) for bin_id, indices in bins.items())
+        )
+        return results
+
+    async def _summarize_batch_request(self, contents: List[str],
+                                       max_length: int = 200,
+                                       per_item_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Issue one batched summarize request for the given contents."""
+
+        prompt = self._build_batch_summarize_prompt(contents, max_length)
+
+        try:
+            async with self._llm_semaphore:
+                response = await self.async_client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant that creates clear, concise summaries."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=(per_item_tokens or max_length * 2) * len(contents)
+                )
+            return self._parse_batch_summaries(
+                response.choices[0].message.content, contents
+            )
+        except Exception as e:
+            return [
+                {
+                    "summary": f"Error generating summary: {str(e)}",
+                    "error": str(e),
+                    "message": "❌ Failed to generate summary"
+                }
+                for _ in contents
+            ]
+
+    @staticmethod
+    def _build_batch_summarize_prompt(contents: List[str], max_length: int) -> str:
+        """Build a single prompt covering all documents in the batch."""
+        documents = "\n\n".join(
+            f"[DOC {i}]\n{content}" for i, content in enumerate(contents)
+        )
+        return f"""Summarize each of the following {len(contents)} documents in bullet points (max {max_length} words each).
+Return a JSON object: {{"summaries": [{{"i": 0, "summary": "..."}}, ...]}} with one entry per document.
+
+{documents}"""
+
+    @staticmethod
+    def _loads_json_reply(content: str) -> Dict[str, Any]:
+        """Parse a JSON reply, extracting the object from any wrapping text."""
+        try:
+            return _loads(content)
+        except (ValueError, TypeError):
+            match = _JSON_OBJECT_RE.search(content)
+            if match is None:
+                raise
+            return _loads(match.group(0))
+
+    def _parse_batch_summaries(self, content: str,
+                               contents: List[str]) -> List[Dict[str, Any]]:
+        """Map the JSON batch response back to per-document summary results."""
+        summaries = [None] * len(contents)
+        try:
+            payload = self._loads_json_reply(content)
+            for item in payload.get("summaries", []):
+                index = item.get("i")
+                if isinstance(index, int) and 0 <= index < len(contents):
+                    summaries[index] = str(item.get("summary", "")).strip()
+        except (ValueError, TypeError, AttributeError):
+            # Truncated/malformed JSON: salvage every complete entry so
+            # one bad tail doesn't fail the whole batch
+            for match in _SUMMARY_ITEM_RE.finditer(content):
+                index = int(match.group(1))
+                if 0 <= index < len(contents):
+                    try:
+                        summaries[index] = _loads(f'"{match.group(2)}"').strip()
+                    except (ValueError, TypeError):
+                        continue
+
+        results = []
+        for original, summary in zip(contents, summaries):
+            if summary:
+                results.append({
+                    "summary": summary,
+                    "original_length": len(original),
+                    "summary_length": len(summary),
+                    "message": f"📝 Content summarized successfully"
+                })
+            else:
+                results.append({
+                    "summary": "Error generating summary: missing batch entry",
+                    "error": "missing batch entry",
+                    "message": "❌ Failed to generate summary"
+                })
+        return results
+
+    def create_task(self, title: str, description: str = "",
                    priority: str = "medium", **kwargs) -> Dict[str, Any]:
         """Create a new task."""
         
-        task_id = f"task_{len(self.tasks) + 1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
+        task_id = f"task_{next(self._task_seq)}_{time.time_ns()}"
+
         task = {
             "id": task_id,
             "title": title,
@@ -66,8 +436,9 @@ class ExecutorAgent:
             "status": "pending",
             "created_at": datetime.now().isoformat()
         }
-        
-        self.tasks.append(task)
+
+        with self._state_lock:
+            self.tasks.append(task)
         
         return {
             "task_id": task_id,
@@ -77,13 +448,21 @@ class ExecutorAgent:
     
     def summarize(self, content: str, max_length: int = 200, **kwargs) -> Dict[str, Any]:
         """Summarize the given content using OpenAI."""
-        
+
+        # Full content in the key: the exact tier hashes all of it, so
+        # prefix-sharing documents can't collide; only the embedding
+        # input is truncated
+        cache_key = f"summarize|{max_length}|{content}"
+        cached = self.response_cache.get(cache_key, embed_text=cache_key[:2000])
+        if cached is not None:
+            return cached
+
         prompt = f"""Please summarize the following content in bullet points (max {max_length} words):
 
 {content}
 
 Return a concise summary in bullet point format."""
-        
+
         try:
             response = self.client.chat.completions.create(
                 model="gpt-4",
@@ -92,18 +471,21 @@ Return a concise summary in bullet point format."""
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
-                max_tokens=max_length * 2
+                max_tokens=max_length * 2,
+                stream=True
             )
-            
-            summary = response.choices[0].message.content.strip()
-            
-            return {
+
+            summary = self._collect_stream(response).strip()
+
+            result = {
                 "summary": summary,
                 "original_length": len(content),
                 "summary_length": len(summary),
                 "message": f"📝 Content summarized successfully"
             }
-            
+            self.response_cache.put(cache_key, result, embed_text=cache_key[:2000])
+            return result
+
         except Exception as e:
             return {
                 "summary": f"Error generating summary: {str(e)}",
@@ -111,21 +493,75 @@ Return a concise summary in bullet point format."""
                 "message": "❌ Failed to generate summary"
             }
     
+    async def _create_task_async(self, title: str, description: str = "",
+                                 priority: str = "medium", **kwargs) -> Dict[str, Any]:
+        """Async wrapper for create_task (no I/O, runs inline)."""
+        return self.create_task(title, description, priority, **kwargs)
+
+    async def _summarize_async(self, content: str, max_length: int = 200, **kwargs) -> Dict[str, Any]:
+        """Async variant of summarize using the AsyncOpenAI client."""
+
+        # Full content in the key: the exact tier hashes all of it, so
+        # prefix-sharing documents can't collide; only the embedding
+        # input is truncated
+        cache_key = f"summarize|{max_length}|{content}"
+        cached = await self.response_cache.get_async(cache_key, embed_text=cache_key[:2000])
+        if cached is not None:
+            return cached
+
+        prompt = f"""Please summarize the following content in bullet points (max {max_length} words):
+
+{content}
+
+Return a concise summary in bullet point format."""
+
+        try:
+            async with self._llm_semaphore:
+                response = await self.async_client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant that creates clear, concise summaries."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=max_length * 2
+                )
+
+            summary = response.choices[0].message.content.strip()
+
+            result = {
+                "summary": summary,
+                "original_length": len(content),
+                "summary_length": len(summary),
+                "message": f"📝 Content summarized successfully"
+            }
+            await self.response_cache.put_async(cache_key, result, embed_text=cache_key[:2000])
+            return result
+
+        except Exception as e:
+            return {
+                "summary": f"Error generating summary: {str(e)}",
+                "error": str(e),
+                "message": "❌ Failed to generate summary"
+            }
+
     def generate_report(self, title: str, sections: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
         """Generate a formatted report from sections of content."""
         
-        report_id = f"report_{len(self.reports) + 1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        # Generate markdown report
-        report_content = f"# {title}\n\n"
-        report_content += f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        report_id = f"report_{next(self._report_seq)}_{time.time_ns()}"
         
+        # Generate markdown report; joining parts once avoids the quadratic
+        # cost of repeated string concatenation on large reports
+        parts = [
+            f"# {title}",
+            f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        ]
+
         for section in sections:
-            section_title = section.get("title", "Section")
-            section_content = section.get("content", "")
-            
-            report_content += f"## {section_title}\n\n"
-            report_content += f"{section_content}\n\n"
+            parts.append(f"## {section.get('title', 'Section')}")
+            parts.append(f"{section.get('content', '')}")
+
+        report_content = "\n\n".join(parts) + "\n\n"
         
         report = {
             "id": report_id,
@@ -135,7 +571,8 @@ Return a concise summary in bullet point format."""
             "created_at": datetime.now().isoformat()
         }
         
-        self.reports.append(report)
+        with self._state_lock:
+            self.reports.append(report)
         
         return {
             "report_id": report_id,
@@ -143,9 +580,21 @@ Return a concise summary in bullet point format."""
             "message": f"📊 Report '{title}' generated successfully"
         }
     
+    async def _generate_report_async(self, title: str, sections: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        """Async wrapper for generate_report (no I/O, runs inline)."""
+        return self.generate_report(title, sections, **kwargs)
+
     def create_checklist(self, title: str, content: str = "", **kwargs) -> Dict[str, Any]:
         """Create a checklist from content."""
-        
+
+        # Full content in the key: the exact tier hashes all of it, so
+        # prefix-sharing documents can't collide; only the embedding
+        # input is truncated
+        cache_key = f"create_checklist|{title}|{content}"
+        cached = self.response_cache.get(cache_key, embed_text=cache_key[:2000])
+        if cached is not None:
+            return cached
+
         prompt = f"""Extract actionable checklist items from the following content:
 
 {content}
@@ -160,41 +609,104 @@ Return a numbered list of clear, actionable items."""
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
-                max_tokens=500
+                max_tokens=500,
+                stream=True
             )
-            
-            checklist_text = response.choices[0].message.content.strip()
-            
-            # Parse items (simple parsing)
-            items = []
-            for line in checklist_text.split('\n'):
-                line = line.strip()
-                if line.startswith(('1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.', '-', '•')):
-                    item_text = line.split('.', 1)[-1].strip() if '.' in line else line[1:].strip()
-                    items.append({"item": item_text, "completed": False})
-            
-            checklist = {
-                "title": title,
-                "items": items,
-                "total_items": len(items),
-                "created_at": datetime.now().isoformat()
-            }
-            
+
+            checklist_text = self._collect_stream(response).strip()
+            result = self._build_checklist(title, checklist_text)
+            self.response_cache.put(cache_key, result, embed_text=cache_key[:2000])
+            return result
+
+        except Exception as e:
             return {
-                "checklist": checklist,
-                "message": f"📋 Checklist '{title}' created with {len(items)} items"
+                "checklist": {"title": title, "items": [], "total_items": 0},
+                "error": str(e),
+                "message": "❌ Failed to create checklist"
             }
-            
+
+    @staticmethod
+    def _collect_stream(response) -> str:
+        """Accumulate a streamed chat completion into its full text."""
+        parts = []
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+        return "".join(parts)
+
+    def _build_checklist(self, title: str, checklist_text: str) -> Dict[str, Any]:
+        """Parse LLM checklist output into a structured checklist result."""
+
+        # Extract items in one pass; the regex also handles items 10+
+        items = [
+            {"item": match.group(1), "completed": False}
+            for match in _CHECKLIST_RE.finditer(checklist_text)
+        ]
+
+        checklist = {
+            "title": title,
+            "items": items,
+            "total_items": len(items),
+            "created_at": datetime.now().isoformat()
+        }
+
+        return {
+            "checklist": checklist,
+            "message": f"📋 Checklist '{title}' created with {len(items)} items"
+        }
+    
+    async def _create_checklist_async(self, title: str, content: str = "", **kwargs) -> Dict[str, Any]:
+        """Async variant of create_checklist using the AsyncOpenAI client."""
+
+        # Full content in the key: the exact tier hashes all of it, so
+        # prefix-sharing documents can't collide; only the embedding
+        # input is truncated
+        cache_key = f"create_checklist|{title}|{content}"
+        cached = await self.response_cache.get_async(cache_key, embed_text=cache_key[:2000])
+        if cached is not None:
+            return cached
+
+        prompt = f"""Extract actionable checklist items from the following content:
+
+{content}
+
+Return a numbered list of clear, actionable items."""
+
+        try:
+            async with self._llm_semaphore:
+                response = await self.async_client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[
+                        {"role": "system", "content": "You are an expert at extracting actionable tasks."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=500
+                )
+
+            checklist_text = response.choices[0].message.content.strip()
+            result = self._build_checklist(title, checklist_text)
+            await self.response_cache.put_async(cache_key, result, embed_text=cache_key[:2000])
+            return result
+
         except Exception as e:
             return {
                 "checklist": {"title": title, "items": [], "total_items": 0},
                 "error": str(e),
                 "message": "❌ Failed to create checklist"
             }
-    
+
     def analyze_content(self, content: str, analysis_type: str = "general", **kwargs) -> Dict[str, Any]:
         """Analyze content for insights."""
-        
+
+        # Full content in the key: the exact tier hashes all of it, so
+        # prefix-sharing documents can't collide; only the embedding
+        # input is truncated
+        cache_key = f"analyze_content|{analysis_type}|{content}"
+        cached = self.response_cache.get(cache_key, embed_text=cache_key[:2000])
+        if cached is not None:
+            return cached
+
         prompt = f"""Analyze this content and provide key insights and important points:
 
 {content}
@@ -209,17 +721,20 @@ Provide a structured analysis with clear sections."""
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
-                max_tokens=800
+                max_tokens=800,
+                stream=True
             )
-            
-            analysis = response.choices[0].message.content.strip()
-            
-            return {
+
+            analysis = self._collect_stream(response).strip()
+
+            result = {
                 "analysis": analysis,
                 "analysis_type": analysis_type,
                 "message": f"🔍 Content analysis completed successfully"
             }
-            
+            self.response_cache.put(cache_key, result, embed_text=cache_key[:2000])
+            return result
+
         except Exception as e:
             return {
                 "analysis": f"Error during analysis: {str(e)}",
@@ -227,6 +742,52 @@ Provide a structured analysis with clear sections."""
                 "message": "❌ Content analysis failed"
             }
     
+    async def _analyze_content_async(self, content: str, analysis_type: str = "general", **kwargs) -> Dict[str, Any]:
+        """Async variant of analyze_content using the AsyncOpenAI client."""
+
+        # Full content in the key: the exact tier hashes all of it, so
+        # prefix-sharing documents can't collide; only the embedding
+        # input is truncated
+        cache_key = f"analyze_content|{analysis_type}|{content}"
+        cached = await self.response_cache.get_async(cache_key, embed_text=cache_key[:2000])
+        if cached is not None:
+            return cached
+
+        prompt = f"""Analyze this content and provide key insights and important points:
+
+{content}
+
+Provide a structured analysis with clear sections."""
+
+        try:
+            async with self._llm_semaphore:
+                response = await self.async_client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[
+                        {"role": "system", "content": "You are an expert analyst."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=800
+                )
+
+            analysis = response.choices[0].message.content.strip()
+
+            result = {
+                "analysis": analysis,
+                "analysis_type": analysis_type,
+                "message": f"🔍 Content analysis completed successfully"
+            }
+            await self.response_cache.put_async(cache_key, result, embed_text=cache_key[:2000])
+            return result
+
+        except Exception as e:
+            return {
+                "analysis": f"Error during analysis: {str(e)}",
+                "error": str(e),
+                "message": "❌ Content analysis failed"
+            }
+
     def get_tasks(self) -> List[Dict[str, Any]]:
         """Get all created tasks."""
         return self.tasks
@@ -2,18 +2,100 @@ from typing import List, Dict, Any
 import openai
 from openai import OpenAI
 import json
+import os
 import re
 
+from jsonio import loads as _loads, dumps as _dumps
 
-class PlannerAgent:
-    """Agent responsible for breaking down user queries into actionable steps."""
-    
-    def __init__(self, client: OpenAI):
-        self.client = client
-        self.agent_name = "Planner"
-        
-        # System prompt for the planner
-        self.system_prompt = """You are a smart planning agent in a multi-agent AI assistant system. Your role is to analyze user queries and break them down into clear, actionable steps that other agents can execute.
+# Precompiled once instead of per call; greedy match grabs the outermost object
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Start of the "steps" array in a streamed plan response
+_STEPS_RE = re.compile(r'"steps"\s*:\s*\[')
+
+
+class _StepStreamParser:
+    """Incrementally extracts completed step objects from a streamed plan.
+
+    Tracks brace depth (string- and escape-aware) inside the "steps" array
+    so each step can be handed to the orchestrator as soon as it closes,
+    long before the model finishes emitting the full plan.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._in_steps = False
+        self._in_string = False
+        self._escape = False
+        self._depth = 0
+        self._obj_start = None
+        self.done = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume a streamed fragment and return any newly completed steps."""
+        self._buf += text
+        steps = []
+
+        if self.done:
+            return steps
+
+        if not self._in_steps:
+            match = _STEPS_RE.search(self._buf)
+            if not match:
+                return steps
+            self._in_steps = True
+            self._pos = match.end()
+
+        i = self._pos
+        while i < len(self._buf):
+            ch = self._buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                if self._depth == 0:
+                    self._obj_start = i
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0 and self._obj_start is not None:
+                    try:
+                        steps.append(_loads(self._buf[self._obj_start:i + 1]))
+                    except (ValueError, TypeError):
+                        pass
+                    self._obj_start = None
+            elif ch == ']' and self._depth == 0:
+                self.done = True
+                i += 1
+                break
+            i += 1
+
+        self._pos = i
+        return steps
+
+# Planning is a structured-output task, so a smaller/faster model with
+# few-shot examples is the default; set PLANNER_MODEL=gpt-4 to roll back.
+DEFAULT_PLANNER_MODEL = "gpt-4o-mini"
+
+# Base gpt-4/gpt-3.5 snapshots reject response_format with a 400; JSON
+# mode is only requested on models that support it (the regex-based
+# extraction handles free-form replies either way)
+_JSON_MODE_UNSUPPORTED = ("gpt-4", "gpt-4-0314", "gpt-4-0613",
+                          "gpt-3.5-turbo", "gpt-3.5-turbo-0301",
+                          "gpt-3.5-turbo-0613")
+
+# Static system prompt, shared by all planner calls. OpenAI's server-side
+# prompt cache serves stable prefixes automatically, so keep this constant
+# byte-identical across requests (no interpolated values) and put all
+# per-request content strictly after it in the message list.
+_SYSTEM_PROMPT = """You are a smart planning agent in a multi-agent AI assistant system. Your role is to analyze user queries and break them down into clear, actionable steps that other agents can execute.
 
 The system has these agents available:
 1. Retriever Agent: Can search and retrieve relevant information from PDF documents
@@ -53,6 +135,80 @@ Guidelines:
 - Keep steps logical and sequential
 - Make sure the final steps lead to the user's desired outcome"""
 
+# Few-shot exemplars covering the two most common plan shapes
+_FEW_SHOT_EXAMPLES = [
+    {
+        "role": "user",
+        "content": 'User Query: "Summarize the onboarding documents"\n\nPlease analyze this query and create a step-by-step plan to fulfill the user\'s request.'
+    },
+    {
+        "role": "assistant",
+        "content": json.dumps({
+            "analysis": "The user wants a summary of onboarding material, so we retrieve relevant content and then summarize it.",
+            "steps": [
+                {
+                    "step_number": 1,
+                    "agent": "Retriever",
+                    "action": "search",
+                    "description": "Search the documents for onboarding content",
+                    "parameters": {"query": "onboarding"}
+                },
+                {
+                    "step_number": 2,
+                    "agent": "Executor",
+                    "action": "summarize",
+                    "description": "Summarize the retrieved onboarding content",
+                    "parameters": {"content": "retrieved onboarding content"}
+                }
+            ],
+            "expected_outcome": "A concise bullet-point summary of the onboarding documents"
+        })
+    },
+    {
+        "role": "user",
+        "content": 'User Query: "Create a checklist from the security policy"\n\nPlease analyze this query and create a step-by-step plan to fulfill the user\'s request.'
+    },
+    {
+        "role": "assistant",
+        "content": json.dumps({
+            "analysis": "The user wants actionable items from the security policy, so we retrieve the policy and turn it into a checklist.",
+            "steps": [
+                {
+                    "step_number": 1,
+                    "agent": "Retriever",
+                    "action": "search",
+                    "description": "Search the documents for security policy content",
+                    "parameters": {"query": "security policy"}
+                },
+                {
+                    "step_number": 2,
+                    "agent": "Executor",
+                    "action": "create_checklist",
+                    "description": "Create a checklist from the security policy content",
+                    "parameters": {"title": "Security Policy Checklist", "content": "retrieved policy content"}
+                }
+            ],
+            "expected_outcome": "A checklist of actionable items from the security policy"
+        })
+    }
+]
+
+
+class PlannerAgent:
+    """Agent responsible for breaking down user queries into actionable steps."""
+    
+    def __init__(self, client: OpenAI):
+        self.client = client
+        self.agent_name = "Planner"
+        self.model = os.getenv("PLANNER_MODEL", DEFAULT_PLANNER_MODEL)
+        self._json_kwargs = (
+            {} if self.model in _JSON_MODE_UNSUPPORTED
+            else {"response_format": {"type": "json_object"}}
+        )
+
+        # System prompt for the planner (stable prefix for prompt caching)
+        self.system_prompt = _SYSTEM_PROMPT
+
     def plan(self, user_query: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Generate a plan for the given user query."""
         
@@ -63,69 +219,128 @@ Please analyze this query and create a step-by-step plan to fulfill the user's r
 
         # Add context if available
         if context:
-            user_prompt += f"\n\nAdditional Context: {json.dumps(context, indent=2)}"
+            user_prompt += f"\n\nAdditional Context: {_dumps(context, indent=True)}"
 
         try:
             # Call OpenAI API
             response = self.client.chat.completions.create(
-                model="gpt-4",
+                model=self.model,
                 messages=[
                     {"role": "system", "content": self.system_prompt},
+                    *_FEW_SHOT_EXAMPLES,
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.3,
-                max_tokens=1500
+                max_tokens=1500,
+                **self._json_kwargs,
+                stream=True
             )
-            
-            # Extract the response content
-            content = response.choices[0].message.content.strip()
-            
-            # Try to parse as JSON
-            try:
-                plan = json.loads(content)
-                
-                # Validate the plan structure
-                if self._validate_plan(plan):
-                    return {
-                        "success": True,
-                        "plan": plan,
-                        "raw_response": content
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": "Generated plan has invalid structure",
-                        "raw_response": content
-                    }
-                    
-            except json.JSONDecodeError:
-                # Try to extract JSON from the response if it's wrapped in text
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    try:
-                        plan = json.loads(json_match.group())
-                        if self._validate_plan(plan):
-                            return {
-                                "success": True,
-                                "plan": plan,
-                                "raw_response": content
-                            }
-                    except json.JSONDecodeError:
-                        pass
-                
+
+            # Consume tokens as they arrive instead of waiting for the
+            # full completion, overlapping network time with assembly
+            parts = []
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+
+            content = "".join(parts).strip()
+            return self._extract_plan(content)
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"OpenAI API error: {str(e)}",
+                "raw_response": None
+            }
+
+    def plan_stream(self, user_query: str, context: Dict[str, Any] = None):
+        """Stream a plan, yielding steps as soon as each one is complete.
+
+        Yields ("step", step_dict) tuples while the model is still
+        generating, so the orchestrator can start executing step 1 before
+        step 3 has been emitted. A final ("plan", plan_result) tuple
+        carries the fully parsed and validated plan.
+        """
+
+        user_prompt = f"""User Query: "{user_query}"
+
+Please analyze this query and create a step-by-step plan to fulfill the user's request."""
+
+        if context:
+            user_prompt += f"\n\nAdditional Context: {_dumps(context, indent=True)}"
+
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    *_FEW_SHOT_EXAMPLES,
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.3,
+                max_tokens=1500,
+                **self._json_kwargs,
+                stream=True
+            )
+        except Exception as e:
+            yield ("plan", {
+                "success": False,
+                "error": f"OpenAI API error: {str(e)}",
+                "raw_response": None
+            })
+            return
+
+        parser = _StepStreamParser()
+        parts = []
+        for chunk in response:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            delta = chunk.choices[0].delta.content
+            parts.append(delta)
+            for step in parser.feed(delta):
+                yield ("step", step)
+
+        content = "".join(parts).strip()
+        yield ("plan", self._extract_plan(content))
+
+    def _extract_plan(self, content: str) -> Dict[str, Any]:
+        """Parse a model response into a validated plan result.
+
+        Tries a direct JSON parse first (orjson when available); falls back
+        to extracting the outermost JSON object when the model wrapped it
+        in prose.
+        """
+        try:
+            plan = _loads(content)
+        except (ValueError, TypeError):
+            plan = None
+            json_match = _JSON_RE.search(content)
+            if json_match:
+                try:
+                    plan = _loads(json_match.group())
+                except (ValueError, TypeError):
+                    plan = None
+
+            if plan is None:
                 return {
                     "success": False,
                     "error": "Could not parse response as JSON",
                     "raw_response": content
                 }
-                
-        except Exception as e:
+
+        if self._validate_plan(plan):
             return {
-                "success": False,
-                "error": f"OpenAI API error: {str(e)}",
-                "raw_response": None
+                "success": True,
+                "plan": plan,
+                "raw_response": content
             }
-    
+
+        return {
+            "success": False,
+            "error": "Generated plan has invalid structure",
+            "raw_response": content
+        }
+
     def _validate_plan(self, plan: Dict[str, Any]) -> bool:
         """Validate that the plan has the required structure."""
         required_fields = ["analysis", "steps", "expected_outcome"]
@@ -156,7 +371,7 @@ Please analyze this query and create a step-by-step plan to fulfill the user's r
         
         # Prepare the refinement prompt
         refinement_prompt = f"""Original Plan:
-{json.dumps(original_plan, indent=2)}
+{_dumps(original_plan, indent=True)}
 
 Feedback: {feedback}
 
@@ -164,59 +379,24 @@ Please refine the plan based on the feedback provided. Return the updated plan i
         
         # Add context if available
         if context:
-            refinement_prompt += f"\n\nAdditional Context: {json.dumps(context, indent=2)}"
+            refinement_prompt += f"\n\nAdditional Context: {_dumps(context, indent=True)}"
         
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4",
+                model=self.model,
                 messages=[
                     {"role": "system", "content": self.system_prompt},
+                    *_FEW_SHOT_EXAMPLES,
                     {"role": "user", "content": refinement_prompt}
                 ],
                 temperature=0.3,
-                max_tokens=1500
+                max_tokens=1500,
+                **self._json_kwargs
             )
-            
+
             content = response.choices[0].message.content.strip()
-            
-            # Try to parse as JSON
-            try:
-                refined_plan = json.loads(content)
-                
-                if self._validate_plan(refined_plan):
-                    return {
-                        "success": True,
-                        "plan": refined_plan,
-                        "raw_response": content
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": "Refined plan has invalid structure",
-                        "raw_response": content
-                    }
-                    
-            except json.JSONDecodeError:
-                # Try to extract JSON from the response
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    try:
-                        refined_plan = json.loads(json_match.group())
-                        if self._validate_plan(refined_plan):
-                            return {
-                                "success": True,
-                                "plan": refined_plan,
-                                "raw_response": content
-                            }
-                    except json.JSONDecodeError:
-                        pass
-                
-                return {
-                    "success": False,
-                    "error": "Could not parse refined response as JSON",
-                    "raw_response": content
-                }
-                
+            return self._extract_plan(content)
+
         except Exception as e:
             return {
                 "success": False,
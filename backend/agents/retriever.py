@@ -1,4 +1,8 @@
 from typing import List, Dict, Any, Optional
+import asyncio
+import heapq
+import re
+
 from vector_store.chroma_store import ChromaVectorStore  # Changed to ChromaDB
 
 
@@ -9,31 +13,23 @@ class RetrieverAgent:
         self.vector_store = vector_store
         self.agent_name = "Retriever"
     
-    def search(self, query: str, k: int = 4, score_threshold: float = 0.3) -> Dict[str, Any]:
+    def search(self, query: str, k: int = 4, score_threshold: float = 0.3,
+               include_preview: bool = True,
+               query_embedding: Optional[List[float]] = None) -> Dict[str, Any]:
         """Perform a search query against the vector store."""
-        
+
         try:
             # Perform similarity search
             results = self.vector_store.similarity_search(
-                query=query, 
-                k=k, 
-                score_threshold=score_threshold
+                query=query,
+                k=k,
+                score_threshold=score_threshold,
+                query_embedding=query_embedding
             )
-            
+
             # Process and format results
-            formatted_results = []
-            for i, result in enumerate(results):
-                formatted_result = {
-                    "rank": i + 1,
-                    "content": result["content"],
-                    "source_file": result["metadata"].get("source_file", "unknown"),
-                    "page": result["metadata"].get("page", "unknown"),
-                    "chunk_id": result["metadata"].get("chunk_id", "unknown"),
-                    "similarity_score": round(result["similarity_score"], 4),
-                    "content_preview": result["content"][:200] + "..." if len(result["content"]) > 200 else result["content"]
-                }
-                formatted_results.append(formatted_result)
-            
+            formatted_results = self._format_results(results, include_preview)
+
             # Generate summary of search results
             summary = self._generate_search_summary(query, formatted_results)
             
@@ -58,36 +54,82 @@ class RetrieverAgent:
                 "total_results": 0
             }
     
+    @staticmethod
+    def _format_results(results: List[Dict[str, Any]],
+                        include_preview: bool = True) -> List[Dict[str, Any]]:
+        """Format raw search hits in a single pass over the results."""
+
+        if include_preview:
+            return [
+                {
+                    "rank": i + 1,
+                    "content": (content := result["content"]),
+                    "source_file": (md := result["metadata"]).get("source_file", "unknown"),
+                    "page": md.get("page", "unknown"),
+                    "chunk_id": md.get("chunk_id", "unknown"),
+                    "similarity_score": round(result["similarity_score"], 4),
+                    "content_preview": content[:200] + "..." if len(content) > 200 else content
+                }
+                for i, result in enumerate(results)
+            ]
+
+        # Callers like search_multiple_queries don't need the preview slice
+        return [
+            {
+                "rank": i + 1,
+                "content": result["content"],
+                "source_file": (md := result["metadata"]).get("source_file", "unknown"),
+                "page": md.get("page", "unknown"),
+                "chunk_id": md.get("chunk_id", "unknown"),
+                "similarity_score": round(result["similarity_score"], 4)
+            }
+            for i, result in enumerate(results)
+        ]
+
+    def search_batch(self, queries: List[str], k: int = 4,
+                     score_threshold: float = 0.3) -> List[Dict[str, Any]]:
+        """Run several search queries in one batched vector-store call.
+
+        Falls back to per-query search when the store doesn't support
+        batched queries; each response has the same shape as search().
+        """
+        try:
+            raw_batches = self.vector_store.similarity_search_batch(
+                queries, k=k, score_threshold=score_threshold
+            )
+        except Exception:
+            return [self.search(query, k=k, score_threshold=score_threshold)
+                    for query in queries]
+
+        responses = []
+        for query, raw_results in zip(queries, raw_batches):
+            formatted_results = self._format_results(raw_results)
+            responses.append({
+                "success": True,
+                "query": query,
+                "total_results": len(formatted_results),
+                "results": formatted_results,
+                "summary": self._generate_search_summary(query, formatted_results),
+                "search_parameters": {
+                    "k": k,
+                    "score_threshold": score_threshold
+                }
+            })
+        return responses
+
     def search_by_document(self, query: str, source_file: str, k: int = 3) -> Dict[str, Any]:
         """Search within a specific document."""
         
         try:
-            # First, get all results
-            all_results = self.vector_store.similarity_search(query=query, k=k*3)
-            
-            # Filter by source file
-            filtered_results = [
-                result for result in all_results 
-                if result["metadata"].get("source_file", "").lower() == source_file.lower()
-            ]
-            
-            # Take top k results
-            filtered_results = filtered_results[:k]
-            
+            # Filter by source file inside the ChromaDB query itself
+            filtered_results = self.vector_store.similarity_search(
+                query=query, k=k,
+                where={"source_file": {"$eq": source_file}}
+            )
+
             # Format results
-            formatted_results = []
-            for i, result in enumerate(filtered_results):
-                formatted_result = {
-                    "rank": i + 1,
-                    "content": result["content"],
-                    "source_file": result["metadata"].get("source_file", "unknown"),
-                    "page": result["metadata"].get("page", "unknown"),
-                    "chunk_id": result["metadata"].get("chunk_id", "unknown"),
-                    "similarity_score": round(result["similarity_score"], 4),
-                    "content_preview": result["content"][:200] + "..." if len(result["content"]) > 200 else result["content"]
-                }
-                formatted_results.append(formatted_result)
-            
+            formatted_results = self._format_results(filtered_results)
+
             summary = self._generate_search_summary(query, formatted_results, source_file)
             
             return {
@@ -124,20 +166,16 @@ class RetrieverAgent:
             
             documents = stats.get("source_files", [])
             
-            # Get additional info for each document
-            document_info = []
-            for doc in documents:
-                # Count chunks for this document
-                chunk_count = sum(
-                    1 for chunk in self.vector_store.documents 
-                    if chunk.metadata.get("source_file") == doc
-                )
-                
-                document_info.append({
+            # Get additional info for each document (counts come from the
+            # per-source index, no corpus scan)
+            document_info = [
+                {
                     "filename": doc,
-                    "chunk_count": chunk_count,
+                    "chunk_count": self.vector_store.source_chunk_count(doc),
                     "available": True
-                })
+                }
+                for doc in documents
+            ]
             
             return {
                 "success": True,
@@ -153,39 +191,84 @@ class RetrieverAgent:
                 "documents": []
             }
     
+    async def search_async(self, query: str, k: int = 4,
+                           score_threshold: float = 0.3,
+                           include_preview: bool = True,
+                           query_embedding: Optional[List[float]] = None) -> Dict[str, Any]:
+        """Run search in a worker thread so callers can fan out concurrently."""
+        return await asyncio.to_thread(self.search, query, k, score_threshold,
+                                       include_preview, query_embedding)
+
     def search_multiple_queries(self, queries: List[str], k: int = 3) -> Dict[str, Any]:
         """Perform multiple searches and combine results."""
-        
-        all_results = []
-        search_summaries = []
-        
-        for query in queries:
-            result = self.search(query, k=k)
-            if result["success"]:
-                all_results.extend(result["results"])
-                search_summaries.append({
-                    "query": query,
-                    "result_count": result["total_results"],
-                    "summary": result["summary"]
-                })
-        
-        # Remove duplicates based on chunk_id
-        seen_chunks = set()
-        unique_results = []
-        
-        for result in all_results:
-            chunk_id = result.get("chunk_id")
-            if chunk_id not in seen_chunks:
-                seen_chunks.add(chunk_id)
-                unique_results.append(result)
-        
-        # Sort by similarity score
-        unique_results.sort(key=lambda x: x["similarity_score"], reverse=True)
-        
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No running loop: fan the searches out concurrently
+            return asyncio.run(self.search_multiple_queries_async(queries, k=k))
+
+        # Called from inside a loop: fall back to sequential searches
+        embeddings = self._embed_queries_batched(queries)
+        search_results = [
+            self.search(query, k=k, include_preview=False, query_embedding=embedding)
+            for query, embedding in zip(queries, embeddings)
+        ]
+        return self._combine_multi_query_results(queries, search_results, k)
+
+    async def search_multiple_queries_async(self, queries: List[str], k: int = 3) -> Dict[str, Any]:
+        """Concurrent variant of search_multiple_queries (searches are I/O-bound)."""
+        embeddings = await asyncio.to_thread(self._embed_queries_batched, queries)
+        search_results = await asyncio.gather(
+            *[self.search_async(query, k=k, include_preview=False, query_embedding=embedding)
+              for query, embedding in zip(queries, embeddings)]
+        )
+        return self._combine_multi_query_results(queries, list(search_results), k)
+
+    def _embed_queries_batched(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """Embed all queries in one API call, amortizing the HTTP overhead.
+
+        Falls back to per-query embedding inside similarity_search (None
+        entries) if the batched call fails.
+        """
+        try:
+            return self.vector_store.embed_queries(queries)
+        except Exception:
+            return [None] * len(queries)
+
+    def _combine_multi_query_results(self, queries: List[str],
+                                     search_results: List[Dict[str, Any]],
+                                     k: int) -> Dict[str, Any]:
+        """Deduplicate, rank and summarize per-query search results."""
+
+        search_summaries = [
+            {
+                "query": query,
+                "result_count": result["total_results"],
+                "summary": result["summary"]
+            }
+            for query, result in zip(queries, search_results)
+            if result["success"]
+        ]
+
+        # Deduplicate by chunk_id in a single pass (first hit wins)
+        unique_by_chunk = {}
+        for result in search_results:
+            if not result["success"]:
+                continue
+            for hit in result["results"]:
+                unique_by_chunk.setdefault(hit.get("chunk_id"), hit)
+
+        # Top-k selection is O(N log k) instead of a full sort
+        unique_results = heapq.nlargest(
+            k * len(queries), unique_by_chunk.values(),
+            key=lambda x: x["similarity_score"]
+        )
+
         # Re-rank
         for i, result in enumerate(unique_results):
             result["rank"] = i + 1
-        
+
         return {
             "success": True,
             "queries": queries,
@@ -198,12 +281,9 @@ class RetrieverAgent:
         """Get content from a specific source document."""
         
         try:
-            # Get all chunks from the specified source
-            source_chunks = [
-                chunk for chunk in self.vector_store.documents
-                if chunk.metadata.get("source_file", "").lower() == source_file.lower()
-            ]
-            
+            # Get all chunks from the specified source (filtered in ChromaDB)
+            source_chunks = self.vector_store.get_chunks_by_source(source_file)
+
             if not source_chunks:
                 return {
                     "success": False,
@@ -211,11 +291,16 @@ class RetrieverAgent:
                     "content": []
                 }
             
-            # Sort by chunk_id or page number
-            source_chunks.sort(key=lambda x: (
-                x.metadata.get("page", 0),
-                x.metadata.get("chunk_id", 0)
-            ))
+            # Sort by page then chunk_id, computing each key once per chunk.
+            # Int coercion also fixes ordering for string ids, where
+            # "chunk_10" would otherwise sort before "chunk_2"
+            keyed = [
+                ((self._as_int(chunk.metadata.get("page", 0)),
+                  self._as_int(chunk.metadata.get("chunk_id", 0))), chunk)
+                for chunk in source_chunks
+            ]
+            keyed.sort(key=lambda pair: pair[0])
+            source_chunks = [chunk for _, chunk in keyed]
             
             # Limit results
             source_chunks = source_chunks[:max_chunks]
@@ -244,29 +329,42 @@ class RetrieverAgent:
                 "content": []
             }
     
-    def _generate_search_summary(self, query: str, results: List[Dict[str, Any]], 
+    @staticmethod
+    def _as_int(value: Any) -> int:
+        """Coerce page/chunk identifiers like 3, "3" or "chunk_12" to ints."""
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            digits = re.findall(r'\d+', str(value))
+            return int(digits[-1]) if digits else 0
+
+    def _generate_search_summary(self, query: str, results: List[Dict[str, Any]],
                                 source_file: Optional[str] = None) -> str:
         """Generate a summary of search results."""
         
         if not results:
             return f"No relevant results found for query: '{query}'"
-        
-        # Count sources
-        sources = set(result["source_file"] for result in results)
-        
+
+        # Collect sources and the score range in a single pass
+        sources = set()
+        min_score = max_score = results[0]["similarity_score"]
+        for result in results:
+            sources.add(result["source_file"])
+            score = result["similarity_score"]
+            if score < min_score:
+                min_score = score
+            elif score > max_score:
+                max_score = score
+
         summary_parts = [
             f"Found {len(results)} relevant results for query: '{query}'"
         ]
-        
+
         if source_file:
             summary_parts.append(f"from document: {source_file}")
         else:
             summary_parts.append(f"across {len(sources)} document(s): {', '.join(sorted(sources))}")
-        
-        # Add score range
-        if results:
-            max_score = max(result["similarity_score"] for result in results)
-            min_score = min(result["similarity_score"] for result in results)
-            summary_parts.append(f"Similarity scores range from {min_score:.3f} to {max_score:.3f}")
-        
-        return ". ".join(summary_parts) + "." 
\ No newline at end of file
+
+        summary_parts.append(f"Similarity scores range from {min_score:.3f} to {max_score:.3f}")
+
+        return ". ".join(summary_parts) + "."
\ No newline at end of file
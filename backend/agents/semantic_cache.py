@@ -0,0 +1,199 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import threading
+import time
+
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+
+
+class SemanticResponseCache:
+    """Two-tier cache for LLM results: exact hash first, then semantic similarity.
+
+    Keys are embedded with a small embedding model; a lookup whose cosine
+    similarity to a stored key exceeds the threshold returns the cached
+    payload and skips the chat completion entirely. Lookups never raise —
+    any embedding failure is treated as a cache miss.
+
+    The exact tier hashes the full key, so callers can (and should) put
+    the whole content in it; `embed_text` optionally bounds what goes to
+    the embeddings API for the semantic tier. Embeddings computed during
+    a get() miss are held so the following put() for the same key reuses
+    them instead of paying a second embedding round-trip. Async callers
+    should use get_async/put_async, which embed through the async client
+    and keep the event loop free. Internal state is lock-guarded since
+    gets and puts run concurrently from threadpool threads.
+    """
+
+    def __init__(self, client: OpenAI, model: str = "text-embedding-3-small",
+                 similarity_threshold: float = 0.92, ttl: float = 3600.0,
+                 max_entries: int = 512,
+                 async_client: Optional[AsyncOpenAI] = None):
+        self.client = client
+        self.async_client = async_client
+        self.model = model
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # Guards every structure below; embedding calls happen outside it
+        self._lock = threading.Lock()
+        # Exact-hash fast path: digest -> entry index
+        self._exact: Dict[str, int] = {}
+        # Parallel lists: one normalized embedding row per cached entry
+        self._embeddings: List[np.ndarray] = []
+        self._entries: List[Dict[str, Any]] = []
+        # Key embeddings computed on get() misses, reused by put()
+        self._pending: Dict[str, np.ndarray] = {}
+
+    def get(self, key: str,
+            embed_text: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Look up a cached payload for the given key, or None on miss."""
+        hit, digest = self._lookup_exact(key)
+        if hit is not None:
+            return hit
+        if not self._embeddings:
+            return None
+        return self._lookup_semantic(digest, self._embed(embed_text or key))
+
+    async def get_async(self, key: str,
+                        embed_text: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Async get: the tier-2 embedding goes through the async client."""
+        hit, digest = self._lookup_exact(key)
+        if hit is not None:
+            return hit
+        if not self._embeddings:
+            return None
+        return self._lookup_semantic(
+            digest, await self._embed_async(embed_text or key)
+        )
+
+    def put(self, key: str, payload: Dict[str, Any],
+            embed_text: Optional[str] = None) -> None:
+        """Store a payload under the given key."""
+        digest = self._digest(key)
+        key_emb = self._take_parked(digest)
+        if key_emb is None:
+            key_emb = self._embed(embed_text or key)
+        self._store(digest, key_emb, payload)
+
+    async def put_async(self, key: str, payload: Dict[str, Any],
+                        embed_text: Optional[str] = None) -> None:
+        """Async put: any needed embedding goes through the async client."""
+        digest = self._digest(key)
+        key_emb = self._take_parked(digest)
+        if key_emb is None:
+            key_emb = await self._embed_async(embed_text or key)
+        self._store(digest, key_emb, payload)
+
+    def _lookup_exact(self, key: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Tier 1: exact-hash lookup. Returns (payload or None, digest)."""
+        digest = self._digest(key)
+        with self._lock:
+            index = self._exact.get(digest)
+            if index is not None:
+                entry = self._entries[index]
+                if entry["expires_at"] > time.time():
+                    return entry["payload"], digest
+        return None, digest
+
+    def _lookup_semantic(self, digest: str,
+                         key_emb: Optional[np.ndarray]) -> Optional[Dict[str, Any]]:
+        """Tier 2: nearest-neighbor lookup over the stored key embeddings.
+
+        The computed embedding is parked under the key's digest either
+        way, so a following put() for the same key doesn't re-embed it.
+        """
+        if key_emb is None:
+            return None
+
+        with self._lock:
+            self._park_embedding(digest, key_emb)
+            if not self._embeddings:
+                return None
+            similarities = np.vstack(self._embeddings) @ key_emb
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.similarity_threshold:
+                entry = self._entries[best]
+                if entry["expires_at"] > time.time():
+                    return entry["payload"]
+
+        return None
+
+    def _park_embedding(self, digest: str, key_emb: np.ndarray) -> None:
+        """Hold a key embedding for reuse by put(), bounding the backlog.
+
+        Gets without a matching put (hits, error paths) would otherwise
+        accumulate; the oldest parked embedding is dropped past the cap.
+        Caller holds the lock.
+        """
+        if len(self._pending) >= self.max_entries:
+            self._pending.pop(next(iter(self._pending)))
+        self._pending[digest] = key_emb
+
+    def _take_parked(self, digest: str) -> Optional[np.ndarray]:
+        """Claim the embedding parked by a prior get() for this key."""
+        with self._lock:
+            return self._pending.pop(digest, None)
+
+    def _store(self, digest: str, key_emb: Optional[np.ndarray],
+               payload: Dict[str, Any]) -> None:
+        """Append an entry under its digest and key embedding."""
+        if key_emb is None:
+            return
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict_oldest()
+
+            self._entries.append({
+                "payload": payload,
+                "expires_at": time.time() + self.ttl
+            })
+            self._embeddings.append(key_emb)
+            self._exact[digest] = len(self._entries) - 1
+
+    def _evict_oldest(self) -> None:
+        """Drop the oldest cached entry to stay within max_entries.
+
+        Caller holds the lock.
+        """
+        self._entries.pop(0)
+        self._embeddings.pop(0)
+        # Rebuild the exact-hash index with shifted positions
+        self._exact = {
+            digest: index - 1
+            for digest, index in self._exact.items()
+            if index > 0
+        }
+
+    def _embed(self, key: str) -> Optional[np.ndarray]:
+        """Embed a cache key, returning a unit-normalized vector (or None on failure)."""
+        try:
+            response = self.client.embeddings.create(model=self.model, input=key)
+            return self._normalize(response.data[0].embedding)
+        except Exception:
+            return None
+
+    async def _embed_async(self, key: str) -> Optional[np.ndarray]:
+        """Async _embed; without an async client the sync call moves to a thread."""
+        if self.async_client is None:
+            return await asyncio.to_thread(self._embed, key)
+        try:
+            response = await self.async_client.embeddings.create(
+                model=self.model, input=key
+            )
+            return self._normalize(response.data[0].embedding)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
@@ -2,9 +2,14 @@ from fastapi import FastAPI, HTTPException, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
+import asyncio
+import hashlib
 import os
-import shutil
+import time
+import aiofiles
+from fastapi.concurrency import run_in_threadpool
 from main_chroma import WorkspaceGPT  # Using ChromaDB version
+from ingest_manifest import IngestManifest
 
 # Initialize FastAPI app
 app = FastAPI(title="WorkspaceGPT API (ChromaDB)", version="1.0.0")
@@ -21,6 +26,36 @@ app.add_middleware(
 # Initialize WorkspaceGPT
 workspace_gpt = None
 
+# Read-mostly endpoints (/stats, /documents, /tasks, /reports) are cached
+# briefly; any upload invalidates the whole cache
+_READ_CACHE_TTL = 5.0
+_read_cache: Dict[str, Any] = {}
+
+# Content hashes of everything already indexed, for duplicate uploads
+_manifest = IngestManifest()
+
+def _already_indexed(content_hash: str) -> Optional[str]:
+    """Manifest lookup that distrusts records whose indexed copy is gone.
+
+    Wiping the index to force a rebuild leaves manifest rows behind; a
+    rebuilt index only contains what's in the docs folder, so a record
+    whose file is no longer there must not block re-indexing.
+    """
+    existing = _manifest.lookup(content_hash)
+    if existing and not os.path.exists(os.path.join("backend/docs", existing)):
+        return None
+    return existing
+
+def _cache_get(key: str):
+    hit = _read_cache.get(key)
+    if hit and time.monotonic() - hit[1] < _READ_CACHE_TTL:
+        return hit[0]
+    return None
+
+def _cache_put(key: str, value):
+    _read_cache[key] = (value, time.monotonic())
+    return value
+
 # Request/Response models
 class QueryRequest(BaseModel):
     query: str
@@ -41,10 +76,16 @@ class StatsResponse(BaseModel):
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize WorkspaceGPT on startup."""
+    """Kick off WorkspaceGPT initialization without blocking startup."""
+    asyncio.create_task(_initialize_workspace_gpt())
+
+async def _initialize_workspace_gpt():
+    """Build the vector store and agents in a worker thread."""
     global workspace_gpt
     try:
-        workspace_gpt = WorkspaceGPT()
+        # Index building is synchronous and heavy; running it off the
+        # loop lets the server accept connections immediately
+        workspace_gpt = await run_in_threadpool(WorkspaceGPT)
         print("✅ WorkspaceGPT API (ChromaDB) initialized successfully")
     except Exception as e:
         print(f"❌ Failed to initialize WorkspaceGPT API: {str(e)}")
@@ -56,10 +97,23 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Liveness probe: healthy as soon as the server is accepting requests.
+
+    Initialization state is /ready's job; gating liveness on it would let
+    probes kill the process during long index builds.
+    """
+    return {
+        "status": "healthy",
+        "service": "WorkspaceGPT API (ChromaDB)",
+        "initialized": workspace_gpt is not None
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until background initialization finishes."""
     if workspace_gpt is None:
-        raise HTTPException(status_code=503, detail="WorkspaceGPT not initialized")
-    return {"status": "healthy", "service": "WorkspaceGPT API (ChromaDB)"}
+        raise HTTPException(status_code=503, detail="WorkspaceGPT still initializing")
+    return {"status": "ready"}
 
 @app.post("/query", response_model=QueryResponse)
 async def process_query(request: QueryRequest):
@@ -68,7 +122,9 @@ async def process_query(request: QueryRequest):
         raise HTTPException(status_code=503, detail="WorkspaceGPT not initialized")
     
     try:
-        result = workspace_gpt.process_query(request.query)
+        # process_query is synchronous and LLM-bound; run it in the
+        # threadpool so it doesn't block the event loop
+        result = await run_in_threadpool(workspace_gpt.process_query, request.query)
         return QueryResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
@@ -79,9 +135,13 @@ async def get_stats():
     if workspace_gpt is None:
         raise HTTPException(status_code=503, detail="WorkspaceGPT not initialized")
     
+    cached = _cache_get("stats")
+    if cached is not None:
+        return cached
+
     try:
-        stats = workspace_gpt.get_vector_store_stats()
-        return StatsResponse(success=True, stats=stats)
+        stats = await run_in_threadpool(workspace_gpt.get_vector_store_stats)
+        return _cache_put("stats", StatsResponse(success=True, stats=stats))
     except Exception as e:
         return StatsResponse(success=False, error=str(e))
 
@@ -91,9 +151,13 @@ async def list_documents():
     if workspace_gpt is None:
         raise HTTPException(status_code=503, detail="WorkspaceGPT not initialized")
     
+    cached = _cache_get("documents")
+    if cached is not None:
+        return cached
+
     try:
-        result = workspace_gpt.retriever.get_document_list()
-        return result
+        result = await run_in_threadpool(workspace_gpt.retriever.get_document_list)
+        return _cache_put("documents", result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list documents: {str(e)}")
 
@@ -112,29 +176,117 @@ async def upload_document(file: UploadFile = File(...)):
         file_path = f"backend/docs/{file.filename}"
         os.makedirs("backend/docs", exist_ok=True)
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Add to vector store
-        success = workspace_gpt.add_document(file_path)
+        # Stream the upload to disk in 1 MB chunks with async writes,
+        # hashing incrementally along the way (no second read of the file)
+        digest = hashlib.blake2b(digest_size=16)
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(1024 * 1024):
+                digest.update(chunk)
+                await buffer.write(chunk)
+
+        # Identical content already indexed? Skip the embedding work
+        content_hash = digest.hexdigest()
+        existing = _already_indexed(content_hash)
+        if existing:
+            if os.path.basename(file_path) != existing:
+                os.remove(file_path)
+            return {
+                "message": f"Document '{file.filename}' already indexed as '{existing}'",
+                "content_hash": content_hash,
+                "duplicate": True
+            }
+
+        # Indexing embeds the document; keep it off the event loop
+        success = await run_in_threadpool(workspace_gpt.add_document, file_path)
         
         if success:
-            return {"message": f"Document '{file.filename}' uploaded and indexed successfully"}
+            _manifest.record(content_hash, file.filename)
+            _read_cache.clear()
+            return {
+                "message": f"Document '{file.filename}' uploaded and indexed successfully",
+                "content_hash": content_hash
+            }
         else:
             raise HTTPException(status_code=500, detail="Failed to index document")
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@app.post("/upload_batch")
+async def upload_documents(files: List[UploadFile] = File(...)):
+    """Upload several PDF documents and index them in one batched pass."""
+    if workspace_gpt is None:
+        raise HTTPException(status_code=503, detail="WorkspaceGPT not initialized")
+
+    for file in files:
+        if not file.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400,
+                                detail=f"Only PDF files are supported: {file.filename}")
+
+    try:
+        os.makedirs("backend/docs", exist_ok=True)
+        file_paths = []
+        hashes = {}
+        skipped = []
+
+        for file in files:
+            file_path = f"backend/docs/{file.filename}"
+            digest = hashlib.blake2b(digest_size=16)
+            async with aiofiles.open(file_path, "wb") as buffer:
+                while chunk := await file.read(1024 * 1024):
+                    digest.update(chunk)
+                    await buffer.write(chunk)
+
+            existing = _already_indexed(digest.hexdigest())
+            if existing:
+                if file.filename != existing:
+                    os.remove(file_path)
+                skipped.append({"file": file.filename, "already_indexed_as": existing})
+                continue
+            file_paths.append(file_path)
+            hashes[file.filename] = digest.hexdigest()
+
+        if not file_paths:
+            return {"message": "All documents already indexed", "skipped": skipped}
+
+        # One batched embed-and-persist pass for the whole upload
+        result = await run_in_threadpool(workspace_gpt.add_documents, file_paths)
+
+        # Record every file that made it into the index, even when other
+        # files in the batch failed — otherwise the next upload re-embeds
+        # and duplicates the already-indexed ones
+        for filename in result.get("added", []):
+            _manifest.record(hashes[filename], filename)
+        if result.get("added"):
+            _read_cache.clear()
+
+        if result["success"]:
+            return {
+                "message": f"Indexed {len(result['added'])} document(s) "
+                           f"({result['total_chunks']} chunks)",
+                "skipped": skipped,
+                **result
+            }
+        raise HTTPException(status_code=500, detail=f"Failed to index documents: {result['failed']}")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch upload failed: {str(e)}")
+
 @app.get("/tasks")
 async def get_tasks():
     """Get all created tasks."""
     if workspace_gpt is None:
         raise HTTPException(status_code=503, detail="WorkspaceGPT not initialized")
     
+    cached = _cache_get("tasks")
+    if cached is not None:
+        return cached
+
     try:
         tasks = workspace_gpt.executor.get_tasks()
-        return {"tasks": tasks}
+        return _cache_put("tasks", {"tasks": tasks})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get tasks: {str(e)}")
 
@@ -144,12 +296,27 @@ async def get_reports():
     if workspace_gpt is None:
         raise HTTPException(status_code=503, detail="WorkspaceGPT not initialized")
     
+    cached = _cache_get("reports")
+    if cached is not None:
+        return cached
+
     try:
         reports = workspace_gpt.executor.get_reports()
-        return {"reports": reports}
+        return _cache_put("reports", {"reports": reports})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get reports: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # uvloop and httptools swap in the faster event loop and HTTP parser.
+    # Workers default to 1: tasks, reports, sessions and the response
+    # caches all live in-process, and each worker builds its own vector
+    # store. Opt into API_WORKERS > 1 only once that state is shared
+    uvicorn.run(
+        "api_chroma:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("API_WORKERS", "1")),
+        loop="uvloop",
+        http="httptools"
+    ) 
\ No newline at end of file
@@ -1,21 +1,35 @@
 from typing import List, Dict, Any, Optional
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
-import json
+import logging
+import os
+import time
 
+from jsonio import dumps as _dumps, dumps_bytes as _dumps_bytes, loads as _loads
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
 class ContextEntry:
     """Represents a single entry in the conversation context."""
-    timestamp: datetime
+    # Captured with time.time_ns(): an int is cheaper to create and
+    # serialize than a datetime on the per-action hot path
+    timestamp_ns: int
     agent: str
     action: str
     input_data: Dict[str, Any]
     output_data: Dict[str, Any]
     metadata: Optional[Dict[str, Any]] = None
 
+    @property
+    def timestamp(self) -> datetime:
+        """Entry time as a datetime, for callers that want one."""
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9)
 
-@dataclass
+
+@dataclass(slots=True)
 class ConversationContext:
     """Maintains the full context of a conversation session."""
     session_id: str
@@ -23,12 +37,16 @@ class ConversationContext:
     entries: List[ContextEntry] = field(default_factory=list)
     current_step: int = 0
     status: str = "active"  # active, completed, error
-    
-    def add_entry(self, agent: str, action: str, input_data: Dict[str, Any], 
+    max_entries: int = 200
+    # Maintained incrementally so summaries don't rescan the entries
+    # (and trimmed entries don't drop agents from the set)
+    agents_involved: set = field(default_factory=set)
+
+    def add_entry(self, agent: str, action: str, input_data: Dict[str, Any],
                   output_data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None):
         """Add a new entry to the conversation context."""
         entry = ContextEntry(
-            timestamp=datetime.now(),
+            timestamp_ns=time.time_ns(),
             agent=agent,
             action=action,
             input_data=input_data,
@@ -36,8 +54,17 @@ class ConversationContext:
             metadata=metadata
         )
         self.entries.append(entry)
+        self.agents_involved.add(agent)
         self.current_step += 1
+        self.trim()
         return entry
+
+    def trim(self, max_entries: Optional[int] = None) -> None:
+        """Drop the oldest entries beyond max_entries so long-running
+        sessions don't grow without bound."""
+        limit = max_entries or self.max_entries
+        if len(self.entries) > limit:
+            del self.entries[:len(self.entries) - limit]
     
     def get_agent_history(self, agent: str) -> List[ContextEntry]:
         """Get all entries for a specific agent."""
@@ -57,7 +84,7 @@ class ConversationContext:
             "status": self.status,
             "entries": [
                 {
-                    "timestamp": entry.timestamp.isoformat(),
+                    "timestamp_ns": entry.timestamp_ns,
                     "agent": entry.agent,
                     "action": entry.action,
                     "input_data": entry.input_data,
@@ -68,33 +95,118 @@ class ConversationContext:
             ]
         }
 
+    def to_bytes(self, indent: bool = False) -> bytes:
+        """Serialize the context straight to JSON bytes.
+
+        Skips the intermediate str round-trip of dumps().decode(); sets
+        (agents_involved, if callers include it) fall back to list via
+        the default handler.
+        """
+        return _dumps_bytes(self.to_dict(), indent=indent,
+                            default=lambda o: sorted(o) if isinstance(o, set) else str(o))
+
 
 class ContextManager:
-    """Manages conversation contexts for the multi-agent system."""
-    
-    def __init__(self):
-        self.contexts: Dict[str, ConversationContext] = {}
+    """Manages conversation contexts for the multi-agent system.
+
+    Keeps at most `max_sessions` contexts in memory as an LRU; older
+    sessions are spilled to JSON files and lazily reloaded on access, so
+    a long-running server doesn't accumulate every session it ever saw.
+    """
+
+    def __init__(self, max_sessions: int = 64,
+                 spill_dir: str = "backend/context/sessions"):
+        self.contexts: "OrderedDict[str, ConversationContext]" = OrderedDict()
         self.active_context: Optional[ConversationContext] = None
-    
+        self.max_sessions = max_sessions
+        self.spill_dir = spill_dir
+
     def create_context(self, session_id: str, user_query: str) -> ConversationContext:
         """Create a new conversation context."""
         context = ConversationContext(session_id=session_id, user_query=user_query)
         self.contexts[session_id] = context
         self.active_context = context
-        print(f"🚀 Created new conversation context: {session_id}")
-        print(f"📝 User Query: {user_query}")
+        self._evict_if_needed()
+        logger.info("🚀 Created new conversation context: %s", session_id)
+        logger.info("📝 User Query: %s", user_query)
         return context
-    
+
     def get_context(self, session_id: str) -> Optional[ConversationContext]:
-        """Get an existing conversation context."""
-        return self.contexts.get(session_id)
-    
+        """Get an existing conversation context, reloading spilled ones."""
+        context = self.contexts.get(session_id)
+        if context is not None:
+            self.contexts.move_to_end(session_id)
+            return context
+        return self._load_spilled(session_id)
+
     def set_active_context(self, session_id: str) -> bool:
         """Set the active conversation context."""
-        if session_id in self.contexts:
-            self.active_context = self.contexts[session_id]
+        context = self.get_context(session_id)
+        if context is not None:
+            self.active_context = context
             return True
         return False
+
+    def _evict_if_needed(self) -> None:
+        """Spill least-recently-used contexts beyond the in-memory cap."""
+        while len(self.contexts) > self.max_sessions:
+            session_id, context = self.contexts.popitem(last=False)
+            if context is self.active_context:
+                # Never evict the context currently being processed:
+                # re-insert it at the MRU end and keep evicting the
+                # next-oldest instead of stopping (which let the map
+                # grow unboundedly whenever the active session was LRU)
+                self.contexts[session_id] = context
+                if len(self.contexts) == 1:
+                    break
+                continue
+            self._spill(session_id, context)
+
+    def _spill(self, session_id: str, context: ConversationContext) -> None:
+        """Write an evicted context to its sessions/{id}.json file."""
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"{session_id}.json")
+            with open(path, "wb") as fh:
+                fh.write(context.to_bytes())
+        except Exception as e:
+            logger.warning("Failed to spill context %s: %s", session_id, e)
+
+    def _load_spilled(self, session_id: str) -> Optional[ConversationContext]:
+        """Reload a previously spilled context from disk, if present."""
+        path = os.path.join(self.spill_dir, f"{session_id}.json")
+        try:
+            with open(path, "rb") as fh:
+                payload = _loads(fh.read())
+        except (OSError, ValueError):
+            return None
+
+        context = ConversationContext(
+            session_id=payload["session_id"],
+            user_query=payload["user_query"],
+            current_step=payload.get("current_step", 0),
+            status=payload.get("status", "active")
+        )
+        for entry in payload.get("entries", []):
+            # Older spill files carry an ISO "timestamp" instead of the int
+            timestamp_ns = entry.get("timestamp_ns")
+            if timestamp_ns is None:
+                timestamp_ns = int(
+                    datetime.fromisoformat(entry["timestamp"]).timestamp() * 1e9
+                )
+            context.entries.append(ContextEntry(
+                timestamp_ns=timestamp_ns,
+                agent=entry["agent"],
+                action=entry["action"],
+                input_data=entry["input_data"],
+                output_data=entry["output_data"],
+                metadata=entry.get("metadata")
+            ))
+            context.agents_involved.add(entry["agent"])
+
+        self.contexts[session_id] = context
+        self._evict_if_needed()
+        return context
     
     def log_agent_action(self, agent: str, action: str, input_data: Dict[str, Any], 
                         output_data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None):
@@ -103,18 +215,16 @@ class ContextManager:
             raise ValueError("No active context available")
         
         entry = self.active_context.add_entry(agent, action, input_data, output_data, metadata)
-        
-        # Console logging
-        print(f"\n{'='*60}")
-        print(f"🤖 Agent: {agent}")
-        print(f"⚡ Action: {action}")
-        print(f"📥 Input: {json.dumps(input_data, indent=2)}")
-        print(f"📤 Output: {json.dumps(output_data, indent=2)}")
-        if metadata:
-            print(f"🔍 Metadata: {json.dumps(metadata, indent=2)}")
-        print(f"⏰ Timestamp: {entry.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"{'='*60}")
-        
+
+        # Serializing the payloads dominates the cost of this log line, so
+        # gate it on the debug level instead of dumping on every action
+        logger.info("🤖 Agent: %s | ⚡ Action: %s", agent, action)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📥 Input: %s", _dumps(input_data, indent=True))
+            logger.debug("📤 Output: %s", _dumps(output_data, indent=True))
+            if metadata:
+                logger.debug("🔍 Metadata: %s", _dumps(metadata, indent=True))
+
         return entry
     
     def get_context_summary(self, session_id: Optional[str] = None) -> Dict[str, Any]:
@@ -129,7 +239,7 @@ class ContextManager:
             "total_steps": len(context.entries),
             "current_step": context.current_step,
             "status": context.status,
-            "agents_involved": list(set(entry.agent for entry in context.entries)),
+            "agents_involved": list(context.agents_involved),
             "last_updated": context.entries[-1].timestamp.isoformat() if context.entries else None
         }
         
@@ -139,5 +249,5 @@ class ContextManager:
         """Export context as JSON string."""
         context = self.get_context(session_id)
         if context:
-            return json.dumps(context.to_dict(), indent=2)
+            return context.to_bytes(indent=True).decode()
         return None 
\ No newline at end of file
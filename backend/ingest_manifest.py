@@ -0,0 +1,47 @@
+"""SQLite manifest of ingested documents, keyed by content hash.
+
+Lets the upload endpoints skip re-embedding a file whose exact content
+has already been indexed, even if it arrives under a different name.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "vector_store", "docs_manifest.db")
+
+
+class IngestManifest:
+    """Tracks content hashes of documents already in the vector store."""
+
+    def __init__(self, db_path: str = _DB_PATH):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs_manifest ("
+            "content_hash TEXT PRIMARY KEY, "
+            "filename TEXT, "
+            "indexed_at REAL)"
+        )
+        self._conn.commit()
+
+    def lookup(self, content_hash: str) -> Optional[str]:
+        """Return the filename already indexed for this hash, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT filename FROM docs_manifest WHERE content_hash = ?",
+                (content_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, content_hash: str, filename: str) -> None:
+        """Record a newly indexed document."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO docs_manifest VALUES (?, ?, ?)",
+                (content_hash, filename, time.time())
+            )
+            self._conn.commit()
@@ -0,0 +1,42 @@
+"""Fast JSON helpers shared across the backend.
+
+Uses orjson when installed (a 2-5x faster C implementation for both
+encode and decode) and falls back to the stdlib json module so nothing
+breaks in environments without it.
+"""
+from typing import Any
+import json
+
+try:
+    import orjson
+
+    def loads(data: Any) -> Any:
+        """Deserialize JSON from a str/bytes payload."""
+        return orjson.loads(data)
+
+    def dumps(obj: Any, indent: bool = False) -> str:
+        """Serialize an object to a JSON string."""
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option).decode()
+
+    def dumps_bytes(obj: Any, indent: bool = False, default: Any = None) -> bytes:
+        """Serialize an object straight to JSON bytes (no decode step).
+
+        `default` handles types orjson doesn't know natively (e.g. sets).
+        """
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option, default=default)
+
+except ImportError:
+    def loads(data: Any) -> Any:
+        """Deserialize JSON from a str/bytes payload."""
+        return json.loads(data)
+
+    def dumps(obj: Any, indent: bool = False) -> str:
+        """Serialize an object to a JSON string."""
+        return json.dumps(obj, indent=2 if indent else None)
+
+    def dumps_bytes(obj: Any, indent: bool = False, default: Any = None) -> bytes:
+        """Serialize an object straight to JSON bytes (no decode step)."""
+        return json.dumps(obj, indent=2 if indent else None,
+                          default=default).encode()
@@ -1,10 +1,14 @@
+import concurrent.futures
+import copy
+import hashlib
+import logging
 import os
 import sys
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
 import uuid
 from datetime import datetime
 from dotenv import load_dotenv
-from openai import OpenAI
 
 # Add the backend directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -14,6 +18,32 @@ from vector_store.faiss_store import FAISSVectorStore
 from agents.planner import PlannerAgent
 from agents.retriever import RetrieverAgent
 from agents.executor import ExecutorAgent
+from openai_client import build_client, build_async_client
+
+# Speculative retriever prefetch can be disabled if its hit-rate is poor
+SPECULATIVE_SEARCH = os.getenv("WORKSPACEGPT_SPECULATIVE_SEARCH", "1") != "0"
+
+# Identical queries reuse the cached plan instead of a new planner call
+PLAN_CACHE_SIZE = 1024
+
+# Phase divider, built once instead of per banner
+_DIV = "=" * 60
+
+# Cap on retrieved content handed to executor prompts, in tokens
+RETRIEVED_TOKEN_BUDGET = 6000
+
+try:
+    import tiktoken
+    _ENCODER = tiktoken.get_encoding("cl100k_base")
+
+    def _count_tokens(text: str) -> int:
+        return len(_ENCODER.encode(text))
+except Exception:
+    # Rough heuristic: ~4 characters per token for English text
+    def _count_tokens(text: str) -> int:
+        return len(text) // 4
+
+logger = logging.getLogger(__name__)
 
 
 class WorkspaceGPT:
@@ -23,14 +53,18 @@ class WorkspaceGPT:
         # Load environment variables
         load_dotenv()
         
-        # Initialize OpenAI client
-        self.openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # Initialize OpenAI clients (pooled HTTP/2 transport + retries)
+        self.openai_client = build_client(api_key=os.getenv("OPENAI_API_KEY"))
+        self.openai_async_client = build_async_client(api_key=os.getenv("OPENAI_API_KEY"))
         
         # Initialize components
         print("🚀 Initializing WorkspaceGPT...")
         
         # Context Manager
         self.context_manager = ContextManager()
+
+        # LRU cache of successful plans keyed by normalized query hash
+        self._plan_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         
         # Vector Store
         self.vector_store = FAISSVectorStore(
@@ -41,7 +75,8 @@ class WorkspaceGPT:
         # Agents
         self.planner = PlannerAgent(self.openai_client)
         self.retriever = RetrieverAgent(self.vector_store)
-        self.executor = ExecutorAgent(self.openai_client)
+        self.executor = ExecutorAgent(self.openai_client,
+                                      async_client=self.openai_async_client)
         
         # Initialize vector store
         print("🔄 Setting up vector store...")
@@ -55,15 +90,36 @@ class WorkspaceGPT:
         # Create a new conversation context
         session_id = f"session_{uuid.uuid4().hex[:8]}"
         context = self.context_manager.create_context(session_id, user_query)
-        
+
+        spec_future = None
+        spec_executor = None
         try:
             # Step 1: Planning Phase
-            print("\n" + "="*60)
-            print("🧠 PLANNING PHASE")
-            print("="*60)
-            
-            plan_result = self.planner.plan(user_query)
+            logger.info("\n%s\n🧠 PLANNING PHASE\n%s", _DIV, _DIV)
             
+            # Speculatively fire a retriever search for the raw query while
+            # the planner is generating; most plans start with exactly that
+            # search, so its latency hides behind planning on the common path
+            if SPECULATIVE_SEARCH:
+                spec_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+                spec_future = spec_executor.submit(self.retriever.search, user_query, 4)
+
+            cache_key = hashlib.blake2b(
+                user_query.strip().lower().encode(), digest_size=16
+            ).hexdigest()
+            cached_plan = self._plan_cache.get(cache_key)
+            if cached_plan is not None:
+                self._plan_cache.move_to_end(cache_key)
+                # Deep copy: step execution mutates parameters in place
+                plan_result = copy.deepcopy(cached_plan)
+                print("⚡ Reusing cached plan")
+            else:
+                plan_result = self.planner.plan(user_query)
+                if plan_result.get("success"):
+                    self._plan_cache[cache_key] = copy.deepcopy(plan_result)
+                    if len(self._plan_cache) > PLAN_CACHE_SIZE:
+                        self._plan_cache.popitem(last=False)
+
             self.context_manager.log_agent_action(
                 agent="Planner",
                 action="create_plan",
@@ -82,14 +138,87 @@ class WorkspaceGPT:
             
             plan = plan_result["plan"]
             print(f"📋 Generated plan with {len(plan['steps'])} steps")
+
+            # Resolve the speculative search against the finalized plan
+            spec_result = None
+            spec_step_number = None
+            if spec_future is not None:
+                first_search = next(
+                    (s for s in plan["steps"]
+                     if s["agent"] == "Retriever" and s["action"] == "search"),
+                    None
+                )
+                spec_query = (first_search or {}).get("parameters", {}).get("query", "")
+                if first_search and self._queries_similar(user_query, spec_query):
+                    try:
+                        spec_result = spec_future.result()
+                        spec_step_number = first_search["step_number"]
+                        print("⚡ Reusing speculative search result")
+                    except Exception:
+                        spec_result = None
+                else:
+                    spec_future.cancel()
             
             # Step 2: Execute plan steps
-            print("\n" + "="*60)
-            print("⚡ EXECUTION PHASE")
-            print("="*60)
-            
+            logger.info("\n%s\n⚡ EXECUTION PHASE\n%s", _DIV, _DIV)
+
+            # Retriever steps only depend on plan parameters, so they can
+            # all run concurrently up front; executor steps stay sequential
+            # because they consume the accumulated retrieved content
+            retriever_results = {}
+            if spec_result is not None:
+                retriever_results[spec_step_number] = spec_result
+            pending_searches = [
+                s for s in plan["steps"]
+                if s["agent"] == "Retriever" and s["step_number"] not in retriever_results
+            ]
+
+            # Plain search steps sharing the same k collapse into one
+            # batched vector-store call
+            grouped_by_k = {}
+            for s in pending_searches:
+                if s["action"] == "search":
+                    grouped_by_k.setdefault(
+                        s.get("parameters", {}).get("k", 4), []
+                    ).append(s)
+            for k_value, group in grouped_by_k.items():
+                if len(group) < 2:
+                    continue
+                queries = [s.get("parameters", {}).get("query", "") for s in group]
+                try:
+                    batch_results = self.retriever.search_batch(queries, k=k_value)
+                except Exception:
+                    continue
+                for s, batch_result in zip(group, batch_results):
+                    retriever_results[s["step_number"]] = batch_result
+
+            pending_searches = [
+                s for s in pending_searches
+                if s["step_number"] not in retriever_results
+            ]
+            if len(pending_searches) > 1:
+                with concurrent.futures.ThreadPoolExecutor(
+                        max_workers=min(4, len(pending_searches))) as pool:
+                    futures = {
+                        pool.submit(self._execute_retriever_step,
+                                    s["action"], s.get("parameters", {})): s["step_number"]
+                        for s in pending_searches
+                    }
+                    for future in concurrent.futures.as_completed(futures):
+                        try:
+                            retriever_results[futures[future]] = future.result()
+                        except Exception as e:
+                            retriever_results[futures[future]] = {
+                                "success": False,
+                                "error": str(e)
+                            }
+
             step_results = []
             retrieved_content = []  # Store content for later use
+            retrieved_sources = set()  # Distinct sources, tracked as we go
+            success_count = 0
+            failure_count = 0
+            key_achievements = []
             
             for step in plan["steps"]:
                 step_number = step["step_number"]
@@ -101,8 +230,11 @@ class WorkspaceGPT:
                 print(f"\n🔄 Executing Step {step_number}: {description}")
                 
                 if agent_name == "Retriever":
-                    # Handle retriever steps
-                    result = self._execute_retriever_step(action, parameters)
+                    # Handle retriever steps (prefetched concurrently above;
+                    # results are consumed here in plan order)
+                    result = retriever_results.get(step_number)
+                    if result is None:
+                        result = self._execute_retriever_step(action, parameters)
                     
                     # Store retrieved content for use by executor
                     if result.get("success") and result.get("results"):
@@ -110,6 +242,9 @@ class WorkspaceGPT:
                             {"source": r["source_file"], "content": r["content"]}
                             for r in result["results"]
                         ])
+                        retrieved_sources.update(
+                            r["source_file"] for r in result["results"]
+                        )
                 
                 elif agent_name == "Executor":
                     # Handle executor steps
@@ -133,32 +268,39 @@ class WorkspaceGPT:
                     output_data=result
                 )
                 
-                step_results.append({
+                step_entry = {
                     "step_number": step_number,
                     "agent": agent_name,
                     "action": action,
                     "description": description,
                     "result": result,
                     "success": result.get("success", False)
-                })
+                }
+                step_results.append(step_entry)
+
+                # Track counts and achievements as we go instead of
+                # rescanning step_results afterwards
+                if step_entry["success"]:
+                    success_count += 1
+                    achievement = self._step_achievement(step_entry)
+                    if achievement:
+                        key_achievements.append(achievement)
+                else:
+                    failure_count += 1
             
             # Step 3: Final Summary
-            print("\n" + "="*60)
-            print("📊 SUMMARY")
-            print("="*60)
+            logger.info("\n%s\n📊 SUMMARY\n%s", _DIV, _DIV)
             
-            successful_steps = [s for s in step_results if s["success"]]
-            failed_steps = [s for s in step_results if not s["success"]]
-            
-            print(f"✅ Successful steps: {len(successful_steps)}")
-            print(f"❌ Failed steps: {len(failed_steps)}")
+            print(f"✅ Successful steps: {success_count}")
+            print(f"❌ Failed steps: {failure_count}")
             
             # Generate final summary
             final_summary = self._generate_final_summary(
-                user_query, plan, step_results, retrieved_content
+                user_query, plan, len(step_results), success_count,
+                failure_count, retrieved_sources, key_achievements
             )
             
-            context.status = "completed" if not failed_steps else "completed_with_errors"
+            context.status = "completed" if not failure_count else "completed_with_errors"
             
             return {
                 "session_id": session_id,
@@ -180,7 +322,25 @@ class WorkspaceGPT:
                 "error": str(e),
                 "user_query": user_query
             }
+        finally:
+            # Covers every exit path — including the plan-failure early
+            # return, which used to leak the executor and its thread
+            if spec_executor is not None:
+                spec_executor.shutdown(wait=False)
     
+    @staticmethod
+    def _queries_similar(query_a: str, query_b: str, threshold: float = 0.6) -> bool:
+        """Check whether two search queries are close enough to share results.
+
+        Token-overlap (Jaccard) stands in for embedding cosine here so the
+        check itself costs no extra embedding round-trip.
+        """
+        tokens_a = set(query_a.lower().split())
+        tokens_b = set(query_b.lower().split())
+        if not tokens_a or not tokens_b:
+            return False
+        return len(tokens_a & tokens_b) / len(tokens_a | tokens_b) >= threshold
+
     def _execute_retriever_step(self, action: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a retriever step."""
         
@@ -208,59 +368,75 @@ class WorkspaceGPT:
         
         # Prepare content for summarization/analysis
         if "retrieved_content" in parameters and action in ["summarize", "analyze_content", "create_checklist"]:
-            # Combine retrieved content
-            combined_content = "\n\n".join([
-                f"From {item['source']}: {item['content']}"
-                for item in parameters["retrieved_content"]
-            ])
-            parameters["content"] = combined_content
+            # Combine retrieved content, dropping duplicate chunks (multi-
+            # query searches often return the same chunk twice) and capping
+            # the prompt at a token budget
+            seen_hashes = set()
+            parts = []
+            budget = RETRIEVED_TOKEN_BUDGET
+            for item in parameters["retrieved_content"]:
+                digest = hashlib.blake2b(item["content"].encode(),
+                                         digest_size=16).digest()
+                if digest in seen_hashes:
+                    continue
+                seen_hashes.add(digest)
+                part = f"From {item['source']}: {item['content']}"
+                cost = _count_tokens(part)
+                if cost > budget:
+                    break
+                budget -= cost
+                parts.append(part)
+            parameters["content"] = "\n\n".join(parts)
             # Remove retrieved_content from parameters to avoid confusion
             del parameters["retrieved_content"]
         
-        return self.executor.execute(action, parameters)
+        # ExecResult is converted back to a plain dict at this boundary
+        return self.executor.execute(action, parameters).to_dict()
+    
+    @staticmethod
+    def _step_achievement(step: Dict[str, Any]) -> Optional[str]:
+        """Describe what a successful step accomplished, if noteworthy."""
+        result = step["result"]
+        if not result:
+            return None
+        
+        if step["agent"] == "Retriever":
+            return f"Retrieved {result.get('total_results', 0)} relevant documents for '{step['description']}'"
+        
+        if step["agent"] == "Executor":
+            if step["action"] == "create_task":
+                task_title = result.get("result", {}).get("task", {}).get("title", "Unknown")
+                return f"Created task: {task_title}"
+            
+            if step["action"] == "summarize":
+                return "Generated content summary"
+            
+            if step["action"] == "generate_report":
+                report_title = result.get("result", {}).get("report", {}).get("title", "Unknown")
+                return f"Generated report: {report_title}"
+            
+            if step["action"] == "create_checklist":
+                item_count = result.get("result", {}).get("checklist", {}).get("total_items", 0)
+                return f"Created checklist with {item_count} items"
+        
+        return None
     
-    def _generate_final_summary(self, user_query: str, plan: Dict[str, Any], 
-                               step_results: list, retrieved_content: list) -> Dict[str, Any]:
-        """Generate a final summary of the entire process."""
+    def _generate_final_summary(self, user_query: str, plan: Dict[str, Any],
+                               total_steps: int, successful_steps: int,
+                               failed_steps: int, retrieved_sources: set,
+                               key_achievements: list) -> Dict[str, Any]:
+        """Assemble the final summary from counts tracked during execution."""
         
-        summary = {
+        return {
             "user_query": user_query,
             "plan_analysis": plan.get("analysis", ""),
             "expected_outcome": plan.get("expected_outcome", ""),
-            "total_steps": len(step_results),
-            "successful_steps": len([s for s in step_results if s["success"]]),
-            "failed_steps": len([s for s in step_results if not s["success"]]),
-            "retrieved_documents": len(set(item["source"] for item in retrieved_content)),
-            "key_achievements": []
+            "total_steps": total_steps,
+            "successful_steps": successful_steps,
+            "failed_steps": failed_steps,
+            "retrieved_documents": len(retrieved_sources),
+            "key_achievements": key_achievements
         }
-        
-        # Extract key achievements from successful steps
-        for step in step_results:
-            if step["success"] and step["result"]:
-                result = step["result"]
-                
-                if step["agent"] == "Retriever":
-                    summary["key_achievements"].append(
-                        f"Retrieved {result.get('total_results', 0)} relevant documents for '{step['description']}'"
-                    )
-                
-                elif step["agent"] == "Executor":
-                    if step["action"] == "create_task":
-                        task_title = result.get("result", {}).get("task", {}).get("title", "Unknown")
-                        summary["key_achievements"].append(f"Created task: {task_title}")
-                    
-                    elif step["action"] == "summarize":
-                        summary["key_achievements"].append("Generated content summary")
-                    
-                    elif step["action"] == "generate_report":
-                        report_title = result.get("result", {}).get("report", {}).get("title", "Unknown")
-                        summary["key_achievements"].append(f"Generated report: {report_title}")
-                    
-                    elif step["action"] == "create_checklist":
-                        item_count = result.get("result", {}).get("checklist", {}).get("total_items", 0)
-                        summary["key_achievements"].append(f"Created checklist with {item_count} items")
-        
-        return summary
     
     def get_vector_store_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store."""
@@ -270,6 +446,14 @@ class WorkspaceGPT:
         """Add a document to the vector store."""
         return self.vector_store.add_document(file_path)
 
+    def add_documents(self, file_paths: List[str],
+                      batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """Add several documents to the vector store in one batched pass.
+
+        The store picks its own batch size unless one is given.
+        """
+        return self.vector_store.add_documents(file_paths, batch_size=batch_size)
+
 
 def main():
     """Main function to demonstrate the WorkspaceGPT system."""
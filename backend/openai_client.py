@@ -0,0 +1,39 @@
+"""Factory for the OpenAI clients shared by the agents.
+
+Configures HTTP/2, a larger keep-alive connection pool and SDK-level
+retries so repeated calls reuse warm connections instead of paying TLS
+setup, and transient 429/5xx responses are retried with jittered
+exponential backoff instead of failing the whole plan.
+"""
+import os
+from typing import Optional
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+# The async client multiplexes many in-flight LLM calls (batch summaries,
+# concurrent API requests), so it gets a deeper pool than the sync client
+_ASYNC_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# The OpenAI SDK retries 429/5xx with jittered exponential backoff
+MAX_RETRIES = 3
+
+
+def build_client(api_key: Optional[str] = None) -> OpenAI:
+    """Build a sync OpenAI client with pooling and retries configured."""
+    return OpenAI(
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        max_retries=MAX_RETRIES,
+        http_client=httpx.Client(http2=True, limits=_LIMITS, timeout=_TIMEOUT)
+    )
+
+
+def build_async_client(api_key: Optional[str] = None) -> AsyncOpenAI:
+    """Build an async OpenAI client with pooling and retries configured."""
+    return AsyncOpenAI(
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        max_retries=MAX_RETRIES,
+        http_client=httpx.AsyncClient(http2=True, limits=_ASYNC_LIMITS, timeout=_TIMEOUT)
+    )
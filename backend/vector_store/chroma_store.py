@@ -1,12 +1,29 @@
+import concurrent.futures
+import functools
+import hashlib
 import os
-import glob
+import queue
+import threading
+from collections import defaultdict
 from typing import List, Dict, Any, Optional
-from langchain.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings import OpenAIEmbeddings
+from uuid import uuid4
 from langchain.vectorstores import Chroma
 from langchain.schema import Document
 import chromadb
+import numpy as np
+
+from vector_store.embed_cache import EmbeddingCache
+from vector_store.factories import get_embeddings, get_splitter
+from vector_store.index_manifest import (manifest_path, load_manifest,
+                                           save_manifest, scan_docs,
+                                           diff_manifests, list_pdfs)
+from vector_store.pdf_loader import load_pdf
+
+# Build collections in cosine space: distances come back in [0, 2] and
+# 1 - distance is the true cosine similarity. Chroma's default squared-L2
+# space made that conversion produce out-of-range "similarities" that
+# broke threshold filtering.
+_COLLECTION_METADATA = {"hnsw:space": "cosine"}
 
 
 class ChromaVectorStore:
@@ -25,50 +42,64 @@ class ChromaVectorStore:
         self.persist_directory = persist_directory
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.embeddings = OpenAIEmbeddings()
+        self.embeddings = get_embeddings()
         self.vector_store: Optional[Chroma] = None
         self.documents: List[Document] = []
+        # Per-process memo of query embeddings; repeated queries skip the
+        # embedding round-trip entirely (tuple so results are hashable)
+        self._embed_query_cached = functools.lru_cache(maxsize=1024)(
+            lambda query: tuple(self.embeddings.embed_query(query))
+        )
+        # Persistent cache so rebuilds only embed changed chunks
+        self._embed_cache = EmbeddingCache(
+            model=getattr(self.embeddings, "model", "text-embedding-ada-002")
+        )
+        # Chunks indexed by lowercased source file, maintained at ingest
+        # time so per-document lookups avoid scanning the full corpus
+        self._by_source: Dict[str, List[Document]] = defaultdict(list)
+        # Distance space of the backing collection, read lazily: new
+        # collections are cosine, but a persisted one keeps whatever
+        # space it was created with
+        self._distance_space: Optional[str] = None
         
         # Create docs folder if it doesn't exist
         os.makedirs(docs_folder, exist_ok=True)
         os.makedirs(persist_directory, exist_ok=True)
         
-        # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        # Initialize text splitter (shared per configuration)
+        self.text_splitter = get_splitter(chunk_size, chunk_overlap)
     
     def load_pdfs(self) -> List[Document]:
         """Load all PDF files from the docs folder."""
         print(f"📂 Loading PDFs from {self.docs_folder}...")
         
-        # Find all PDF files
-        pdf_files = glob.glob(os.path.join(self.docs_folder, "*.pdf"))
+        # Find all PDF files (one scandir pass, stats included)
+        pdf_files = [path for path, _ in list_pdfs(self.docs_folder)]
         
         if not pdf_files:
             print(f"⚠️  No PDF files found in {self.docs_folder}")
             return []
         
         documents = []
-        for pdf_file in pdf_files:
+        # PDF parsing is CPU-bound, so multiple files are spread across
+        # worker processes; a single file stays in-process
+        if len(pdf_files) > 1:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=min(os.cpu_count() or 1, len(pdf_files))) as pool:
+                futures = {pdf_file: pool.submit(load_pdf, pdf_file)
+                           for pdf_file in pdf_files}
+                for pdf_file in pdf_files:
+                    try:
+                        pdf_docs = futures[pdf_file].result()
+                        documents.extend(pdf_docs)
+                        print(f"✅ Loaded {len(pdf_docs)} pages from {os.path.basename(pdf_file)}")
+                    except Exception as e:
+                        print(f"❌ Error loading {pdf_file}: {str(e)}")
+        else:
+            pdf_file = pdf_files[0]
             print(f"📄 Loading: {os.path.basename(pdf_file)}")
             try:
-                loader = PyPDFLoader(pdf_file)
-                pdf_docs = loader.load()
-                
-                # Add metadata
-                for doc in pdf_docs:
-                    doc.metadata.update({
-                        "source_file": os.path.basename(pdf_file),
-                        "file_path": pdf_file
-                    })
-                
-                documents.extend(pdf_docs)
-                print(f"✅ Loaded {len(pdf_docs)} pages from {os.path.basename(pdf_file)}")
-                
+                documents.extend(load_pdf(pdf_file))
             except Exception as e:
                 print(f"❌ Error loading {pdf_file}: {str(e)}")
         
@@ -100,71 +131,359 @@ class ChromaVectorStore:
             try:
                 self.vector_store = Chroma(
                     persist_directory=self.persist_directory,
-                    embedding_function=self.embeddings
+                    embedding_function=self.embeddings,
+                    collection_metadata=_COLLECTION_METADATA
                 )
                 print("✅ ChromaDB index loaded successfully")
+                self._sync_with_docs_folder()
                 return self.vector_store
             except Exception as e:
                 print(f"⚠️  Error loading existing index: {str(e)}")
                 print("🔄 Creating new index...")
         
         # Load and process documents
-        documents = self.load_pdfs()
-        if not documents:
+        pdf_files = [path for path, _ in list_pdfs(self.docs_folder)]
+        if not pdf_files:
             # Create empty vector store if no documents
+            print(f"⚠️  No PDF files found in {self.docs_folder}")
             print("🏗️  Creating empty vector store...")
             self.vector_store = Chroma(
                 persist_directory=self.persist_directory,
-                embedding_function=self.embeddings
+                embedding_function=self.embeddings,
+                collection_metadata=_COLLECTION_METADATA
             )
         else:
-            # Split documents into chunks
-            chunks = self.split_documents(documents)
-            self.documents = chunks
-            
-            # Create embeddings and vector store
-            print("🧠 Creating embeddings and building ChromaDB index...")
-            self.vector_store = Chroma.from_documents(
-                documents=chunks,
-                embedding=self.embeddings,
-                persist_directory=self.persist_directory
+            # Parsing, splitting and embedding overlap in a threaded
+            # pipeline, so the embedder never idles waiting for the
+            # whole corpus to finish parsing
+            print("🧠 Building ChromaDB index with a threaded ingest pipeline...")
+            self.vector_store = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings,
+                collection_metadata=_COLLECTION_METADATA
             )
+            self._ingest_pipeline(pdf_files)
         
         # Persist the database
         print(f"💾 Persisting ChromaDB to {self.persist_directory}...")
         self.vector_store.persist()
+        save_manifest(manifest_path(self.persist_directory),
+                      scan_docs(self.docs_folder))
         print("✅ Vector store created and persisted successfully")
         
         return self.vector_store
+
+    def _sync_with_docs_folder(self) -> None:
+        """Incrementally reconcile a loaded index with the docs folder.
+
+        Diffs the folder's (mtime, size) snapshot against the manifest
+        saved with the index: new or changed PDFs are re-ingested and
+        removed ones are deleted, instead of rebuilding everything.
+        """
+        path = manifest_path(self.persist_directory)
+        previous = load_manifest(path)
+        current = scan_docs(self.docs_folder)
+
+        # No manifest means a pre-built index shipped without one (or a
+        # pre-manifest index): diffing against nothing would re-ingest —
+        # and duplicate — every chunk already in it. Just record the
+        # snapshot and let future boots diff against that
+        if not previous:
+            save_manifest(path, current)
+            return
+
+        changed, removed = diff_manifests(previous, current)
+
+        if not changed and not removed:
+            return
+
+        for name in removed:
+            print(f"🗑️  Removing stale document: {name}")
+            try:
+                self.vector_store._collection.delete(where={"source_file": name})
+            except Exception as e:
+                print(f"❌ Error removing {name}: {str(e)}")
+
+        for name in changed:
+            if name in previous:
+                # Changed file: drop the old chunks before re-adding
+                try:
+                    self.vector_store._collection.delete(where={"source_file": name})
+                except Exception:
+                    pass
+            self.add_document(current[name]["path"], flush=False)
+
+        self.flush()
+        save_manifest(path, current)
     
-    def similarity_search(self, query: str, k: int = 4, 
-                         score_threshold: float = 0.3) -> List[Dict[str, Any]]:
-        """Perform similarity search on the vector store."""
+    def _ingest_pipeline(self, pdf_files: List[str]) -> None:
+        """Producer/consumer ingest: loader → splitter → embed-and-add.
+
+        A loader thread parses PDFs onto pdf_q, a splitter thread turns
+        each parsed file into chunks on chunk_q, and this thread embeds
+        and adds chunk batches as they arrive. None is the shutdown
+        sentinel for each queue. (The FAISS store keeps its staged
+        load-then-split-then-build flow, since its index is built in one
+        shot from the full embedding matrix.)
+        """
+        pdf_q: "queue.Queue" = queue.Queue(maxsize=4)
+        chunk_q: "queue.Queue" = queue.Queue(maxsize=8)
+
+        # Both stages put their sentinel in a finally so a stage dying on
+        # an unexpected error can never leave the downstream consumer
+        # blocked forever on its queue
+        def loader():
+            try:
+                for pdf_file in pdf_files:
+                    try:
+                        pdf_q.put(load_pdf(pdf_file))
+                    except Exception as e:
+                        print(f"❌ Error loading {pdf_file}: {str(e)}")
+            finally:
+                pdf_q.put(None)
+
+        def splitter():
+            try:
+                while (pages := pdf_q.get()) is not None:
+                    try:
+                        chunk_q.put(self.text_splitter.split_documents(pages))
+                    except Exception as e:
+                        print(f"❌ Error splitting batch: {str(e)}")
+            finally:
+                chunk_q.put(None)
+
+        threads = [threading.Thread(target=loader, daemon=True),
+                   threading.Thread(target=splitter, daemon=True)]
+        for thread in threads:
+            thread.start()
+
+        while (batch := chunk_q.get()) is not None:
+            if not batch:
+                continue
+            self._add_chunks(batch)
+
+        for thread in threads:
+            thread.join()
+        print(f"📝 Indexed {len(self.documents)} chunks from {len(pdf_files)} file(s)")
+
+    def _add_chunks(self, chunks: List[Document]) -> None:
+        """Embed chunks through the cache and add them to the collection.
+
+        Going through _embed_texts (dedupe + persistent cache) instead of
+        langchain's add_documents means only genuinely new content hits
+        the embeddings API, on every ingest path. IDs are random (like
+        the FAISS path) so adds after a restart can never collide with
+        IDs already persisted in the collection; the chunk_id counter is
+        seeded from the collection count for the same reason.
+        """
+        base = len(self.documents)
+        try:
+            base = max(base, self.vector_store._collection.count())
+        except Exception:
+            pass
+        for i, chunk in enumerate(chunks):
+            chunk.metadata.update({
+                "chunk_id": base + i,
+                "chunk_size": len(chunk.page_content)
+            })
+        texts = [chunk.page_content for chunk in chunks]
+        self.vector_store._collection.add(
+            ids=[str(uuid4()) for _ in chunks],
+            embeddings=self._embed_texts(texts),
+            documents=texts,
+            metadatas=[chunk.metadata for chunk in chunks]
+        )
+        self.documents.extend(chunks)
+        self._index_chunks(chunks)
+
+    def _to_similarity(self, distances: np.ndarray) -> np.ndarray:
+        """Convert collection distances to cosine similarities.
+
+        The space is fixed when a collection is first created, so a
+        persisted index may still be in Chroma's default squared-L2
+        space even though new collections are built in cosine space.
+        OpenAI embeddings are unit-normalized, so squared L2 is
+        2 - 2*cos and cosine/inner-product distances are 1 - cos.
+        """
+        if self._distance_space is None:
+            try:
+                metadata = self.vector_store._collection.metadata or {}
+                self._distance_space = metadata.get("hnsw:space", "l2")
+            except Exception:
+                self._distance_space = "l2"
+        if self._distance_space == "l2":
+            return 1.0 - distances / 2.0
+        return 1.0 - distances
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries in one batched embeddings API call."""
+        return self.embeddings.embed_documents(queries)
+
+    # Large corpora embed in sub-batches this big, with bounded fan-out
+    _EMBED_SUB_BATCH = 1000
+    _EMBED_CONCURRENCY = 8
+
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through the persistent cache; only misses hit the API.
+
+        Identical chunks (repeated headers, footers, boilerplate) are
+        embedded once and the vector is scattered back to every position.
+        """
+        position_of: Dict[bytes, int] = {}
+        unique_texts: List[str] = []
+        positions = []
+        for text in texts:
+            digest = hashlib.sha256(text.encode()).digest()
+            index = position_of.setdefault(digest, len(unique_texts))
+            if index == len(unique_texts):
+                unique_texts.append(text)
+            positions.append(index)
+
+        vectors = self._embed_cache.get_or_compute(
+            unique_texts, self._embed_texts_uncached
+        )
+        return [vectors[index] for index in positions]
+
+    def _embed_texts_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, fanning large corpora out in concurrent sub-batches.
+
+        The fan-out runs on worker threads over the sync client: running
+        the shared async client on a private short-lived event loop would
+        strand its keep-alive connections on the closed loop and break
+        the next large ingest in the same process.
+        """
+        if len(texts) <= self._EMBED_SUB_BATCH:
+            return self.embeddings.embed_documents(texts)
+
+        batches = [texts[i:i + self._EMBED_SUB_BATCH]
+                   for i in range(0, len(texts), self._EMBED_SUB_BATCH)]
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self._EMBED_CONCURRENCY, len(batches))) as pool:
+            results = list(pool.map(self.embeddings.embed_documents, batches))
+        return [vector for batch in results for vector in batch]
+
+    def similarity_search(self, query: str, k: int = 4,
+                         score_threshold: float = 0.3,
+                         where: Optional[Dict[str, Any]] = None,
+                         query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """Perform similarity search on the vector store.
+
+        An optional `where` metadata predicate is pushed down into the
+        ChromaDB query so filtering happens in the engine instead of Python.
+        Callers that already hold the query embedding can pass it via
+        `query_embedding` to skip the per-query embedding round-trip.
+        """
         if not self.vector_store:
             raise ValueError("Vector store not initialized. Call create_vector_store() first.")
-        
+
         print(f"🔍 Searching for: '{query}' (top {k} results)")
+
+        # Perform similarity search with scores; the query embedding comes
+        # from the caller or the LRU memo, never a fresh per-call embed
+        if query_embedding is None:
+            query_embedding = list(self._embed_query_cached(query))
+        docs_with_scores = self.vector_store.similarity_search_by_vector_with_relevance_scores(
+            query_embedding, k=k, filter=where
+        )
         
-        # Perform similarity search with scores
-        docs_with_scores = self.vector_store.similarity_search_with_score(query, k=k)
-        
+        # Convert the collection's distances (whatever space it was
+        # built in) to cosine similarities and threshold everything in
+        # one vectorized pass
         results = []
-        for doc, score in docs_with_scores:
-            # ChromaDB returns similarity scores (higher is better)
-            similarity_score = 1 - score  # Convert distance to similarity
-            
-            if similarity_score >= score_threshold:
-                result = {
+        if docs_with_scores:
+            distances = np.fromiter(
+                (score for _, score in docs_with_scores),
+                dtype=np.float64, count=len(docs_with_scores)
+            )
+            similarities = self._to_similarity(distances)
+            for i in np.flatnonzero(similarities >= score_threshold):
+                doc, score = docs_with_scores[i]
+                results.append({
                     "content": doc.page_content,
                     "metadata": doc.metadata,
-                    "similarity_score": similarity_score,
+                    "similarity_score": float(similarities[i]),
                     "distance": score
-                }
-                results.append(result)
+                })
         
         print(f"📋 Found {len(results)} relevant documents")
         return results
     
+    def similarity_search_batch(self, queries: List[str], k: int = 4,
+                                score_threshold: float = 0.3) -> List[List[Dict[str, Any]]]:
+        """Run several queries against ChromaDB in one round-trip.
+
+        All queries are embedded in one batched API call and passed to a
+        single multi-query collection.query, instead of one engine call
+        per query.
+        """
+        if not self.vector_store:
+            raise ValueError("Vector store not initialized. Call create_vector_store() first.")
+
+        print(f"🔍 Batch searching {len(queries)} queries (top {k} each)")
+
+        embeddings = self.embed_queries(queries)
+        payload = self.vector_store._collection.query(
+            query_embeddings=embeddings,
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+        )
+
+        all_results = []
+        for docs, metadatas, distances in zip(
+                payload["documents"], payload["metadatas"], payload["distances"]):
+            results = []
+            similarities = self._to_similarity(
+                np.asarray(distances, dtype=np.float64)
+            )
+            for content, metadata, distance, similarity_score in zip(
+                    docs, metadatas, distances, similarities):
+                similarity_score = float(similarity_score)
+                if similarity_score >= score_threshold:
+                    results.append({
+                        "content": content,
+                        "metadata": metadata or {},
+                        "similarity_score": similarity_score,
+                        "distance": distance
+                    })
+            all_results.append(results)
+        return all_results
+
+    def get_chunks_by_source(self, source_file: str,
+                             limit: Optional[int] = None) -> List[Document]:
+        """Fetch all chunks for a source file via a ChromaDB metadata filter.
+
+        Falls back to scanning the in-memory document list when the
+        collection query is unavailable (e.g. empty store).
+        """
+        try:
+            collection = self.vector_store._collection
+            payload = collection.get(
+                where={"source_file": source_file},
+                limit=limit
+            )
+            documents = [
+                Document(page_content=content, metadata=metadata or {})
+                for content, metadata in zip(payload["documents"], payload["metadatas"])
+            ]
+            if documents:
+                return documents
+        except Exception:
+            pass
+
+        # Fallback: O(1) lookup in the in-memory source index
+        chunks = self._by_source.get(source_file.lower(), [])
+        return chunks[:limit] if limit else chunks
+
+    def source_chunk_count(self, source_file: str) -> int:
+        """Number of chunks indexed for a source file (O(1) lookup)."""
+        return len(self._by_source.get(source_file.lower(), []))
+
+    def _index_chunks(self, chunks: List[Document]) -> None:
+        """Register chunks in the per-source index."""
+        for chunk in chunks:
+            source = chunk.metadata.get("source_file", "unknown")
+            self._by_source[source.lower()].append(chunk)
+
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store."""
         if not self.vector_store:
@@ -194,45 +513,94 @@ class ChromaVectorStore:
         
         return stats
     
-    def add_document(self, file_path: str) -> bool:
-        """Add a single document to the vector store."""
+    def add_document(self, file_path: str, flush: bool = True) -> bool:
+        """Add a single document to the vector store.
+
+        Bulk loaders can pass flush=False and call flush() once at the
+        end instead of persisting the database after every file.
+        """
         try:
             print(f"📄 Adding document: {file_path}")
             
-            # Load the document
-            loader = PyPDFLoader(file_path)
-            docs = loader.load()
-            
-            # Add metadata
-            for doc in docs:
-                doc.metadata.update({
-                    "source_file": os.path.basename(file_path),
-                    "file_path": file_path
-                })
+            # Load the document (load_pdf tags source metadata)
+            docs = load_pdf(file_path)
             
             # Split into chunks
             chunks = self.text_splitter.split_documents(docs)
             
-            # Add to existing vector store or create new one
-            if self.vector_store:
-                # Add to existing store
-                self.vector_store.add_documents(chunks)
-                self.vector_store.persist()
-            else:
-                # Create new store
-                self.vector_store = Chroma.from_documents(
-                    documents=chunks,
-                    embedding=self.embeddings,
-                    persist_directory=self.persist_directory
+            # Create the store first if needed, then add through the
+            # embedding cache (langchain's add_documents would re-embed
+            # everything API-side)
+            if not self.vector_store:
+                self.vector_store = Chroma(
+                    persist_directory=self.persist_directory,
+                    embedding_function=self.embeddings,
+                    collection_metadata=_COLLECTION_METADATA
                 )
+            self._add_chunks(chunks)
+            # Persisting is deferred when the caller batches adds
+            if flush:
                 self.vector_store.persist()
             
-            # Update documents list
-            self.documents.extend(chunks)
-            
             print(f"✅ Successfully added {len(chunks)} chunks from {os.path.basename(file_path)}")
             return True
-            
+
         except Exception as e:
             print(f"❌ Error adding document {file_path}: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+
+    # Chunks are added to the index in slices this large; larger slices
+    # amortize per-call overhead without holding too much in flight
+    _ADD_BATCH = 250
+
+    def flush(self) -> None:
+        """Persist the database after a series of deferred adds."""
+        if self.vector_store:
+            self.vector_store.persist()
+
+    def add_documents(self, file_paths: List[str],
+                      batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """Add several documents in one pass, persisting the store once.
+
+        Chunks from all files are added in `batch_size` slices and the
+        database is persisted a single time at the end, instead of one
+        embed-and-persist cycle per file.
+        """
+        batch_size = batch_size or self._ADD_BATCH
+        added = []
+        failed = []
+        all_chunks: List[Document] = []
+
+        for file_path in file_paths:
+            try:
+                print(f"📄 Loading document: {file_path}")
+                all_chunks.extend(
+                    self.text_splitter.split_documents(load_pdf(file_path))
+                )
+                added.append(os.path.basename(file_path))
+
+            except Exception as e:
+                print(f"❌ Error loading document {file_path}: {str(e)}")
+                failed.append({"file": os.path.basename(file_path), "error": str(e)})
+
+        if all_chunks:
+            print(f"🧠 Embedding {len(all_chunks)} chunks in batches of {batch_size}...")
+            if not self.vector_store:
+                self.vector_store = Chroma(
+                    persist_directory=self.persist_directory,
+                    embedding_function=self.embeddings,
+                    collection_metadata=_COLLECTION_METADATA
+                )
+            for start in range(0, len(all_chunks), batch_size):
+                self._add_chunks(all_chunks[start:start + batch_size])
+
+            # Persist once for the whole batch
+            self.vector_store.persist()
+            print(f"✅ Successfully added {len(all_chunks)} chunks from {len(added)} file(s)")
+
+        return {
+            "success": not failed,
+            "added": added,
+            "failed": failed,
+            "total_chunks": len(all_chunks)
+        } 
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""Persistent embedding cache backed by SQLite.
+
+Rebuilding an index mostly re-embeds text that hasn't changed; caching
+vectors by content hash means rebuilds only pay the embeddings API for
+new or edited chunks. Vectors are stored as float32 blobs in a WAL-mode
+database so concurrent readers don't block the writer.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Callable, List, Optional
+
+_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "embed_cache.db")
+
+
+def _to_blob(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _from_blob(blob: bytes) -> List[float]:
+    return array("f", blob).tolist()
+
+
+class EmbeddingCache:
+    """Caches embeddings keyed by sha256 of model name + text."""
+
+    def __init__(self, db_path: str = _DB_PATH,
+                 model: str = "text-embedding-ada-002"):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, "
+            "vector BLOB)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.model = model
+
+    def _key(self, text: str) -> str:
+        payload = f"{self.model}\x00{text}".encode()
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_or_compute(self, texts: List[str],
+                       embed_fn: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """Return embeddings for texts, computing only the cache misses.
+
+        `embed_fn` receives just the texts that missed, in order, and its
+        results are written back to the cache.
+        """
+        keys = [self._key(text) for text in texts]
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._conn.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    vectors[i] = _from_blob(row[0])
+
+        miss_indices = [i for i, vector in enumerate(vectors) if vector is None]
+        if miss_indices:
+            computed = embed_fn([texts[i] for i in miss_indices])
+            with self._lock:
+                for i, vector in zip(miss_indices, computed):
+                    vectors[i] = vector
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                        (keys[i], _to_blob(vector))
+                    )
+                self._conn.commit()
+
+        return vectors
@@ -0,0 +1,58 @@
+"""Process-wide singletons for embeddings clients and text splitters.
+
+Each OpenAIEmbeddings instance owns an HTTP connection pool, and the
+splitters are pure configuration, so both stores (and any repeated
+instantiation) share one object per configuration instead of rebuilding
+clients and pools every time. The embeddings ride on the same pooled,
+keep-alive OpenAI clients the agents use, so no embedding batch pays a
+fresh TLS/TCP handshake.
+"""
+import threading
+from typing import Dict, Tuple
+
+from langchain.embeddings import OpenAIEmbeddings
+from langchain.text_splitter import TokenTextSplitter
+
+from openai_client import build_client, build_async_client
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-ada-002"
+
+_lock = threading.Lock()
+_embeddings: Dict[str, OpenAIEmbeddings] = {}
+_splitters: Dict[Tuple[int, int], TokenTextSplitter] = {}
+
+
+def get_embeddings(model: str = DEFAULT_EMBEDDING_MODEL) -> OpenAIEmbeddings:
+    """Return the shared OpenAIEmbeddings client for a model.
+
+    The underlying SDK clients come from openai_client, so embedding
+    calls reuse its keep-alive HTTP/2 pools and retry policy instead of
+    langchain's default per-instance clients.
+    """
+    with _lock:
+        if model not in _embeddings:
+            _embeddings[model] = OpenAIEmbeddings(
+                model=model,
+                client=build_client().embeddings,
+                async_client=build_async_client().embeddings
+            )
+        return _embeddings[model]
+
+
+def get_splitter(chunk_size: int, chunk_overlap: int) -> TokenTextSplitter:
+    """Return the shared splitter for a (chunk_size, chunk_overlap) pair.
+
+    Splitting runs inside tiktoken's compiled tokenizer rather than the
+    recursive pure-Python character splitter, so chunking large corpora
+    is no longer CPU-bound in the interpreter. Sizes are measured in
+    cl100k_base tokens instead of characters.
+    """
+    key = (chunk_size, chunk_overlap)
+    with _lock:
+        if key not in _splitters:
+            _splitters[key] = TokenTextSplitter(
+                encoding_name="cl100k_base",
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            )
+        return _splitters[key]
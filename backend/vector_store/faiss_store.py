@@ -1,70 +1,101 @@
+import concurrent.futures
+import functools
+import hashlib
 import os
-import glob
+from collections import defaultdict
 from typing import List, Dict, Any, Optional
 import faiss
 import pickle
-from langchain.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings import OpenAIEmbeddings
+from uuid import uuid4
+from langchain.docstore.in_memory import InMemoryDocstore
 from langchain.vectorstores import FAISS
 from langchain.schema import Document
 import numpy as np
 
+from vector_store.embed_cache import EmbeddingCache
+from vector_store.factories import get_embeddings, get_splitter
+from vector_store.index_manifest import (manifest_path, load_manifest,
+                                           save_manifest, scan_docs,
+                                           diff_manifests, list_pdfs)
+from vector_store.pdf_loader import load_pdf
+
 
 class FAISSVectorStore:
     """FAISS-based vector store for PDF document retrieval."""
     
-    def __init__(self, docs_folder: str = "backend/docs", 
+    def __init__(self, docs_folder: str = "backend/docs",
                  index_path: str = "backend/vector_store/faiss_index",
-                 chunk_size: int = 1000, chunk_overlap: int = 200):
+                 chunk_size: int = 1000, chunk_overlap: int = 200,
+                 ivf_nlist: int = 4096, ivf_nprobe: int = 16,
+                 pq_m: int = 64, quantization: str = "fp32"):
+        if quantization not in ("fp32", "fp16", "sq8"):
+            raise ValueError(f"Unknown quantization: {quantization} "
+                             f"(expected 'fp32', 'fp16' or 'sq8')")
         self.docs_folder = docs_folder
         self.index_path = index_path
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.embeddings = OpenAIEmbeddings()
+        # IVF-PQ parameters, used once the corpus outgrows HNSW
+        self.ivf_nlist = ivf_nlist
+        self.ivf_nprobe = ivf_nprobe
+        self.pq_m = pq_m
+        # "fp16"/"sq8" store HNSW vectors scalar-quantized (2x/4x
+        # smaller on disk and in memory than fp32)
+        self.quantization = quantization
+        self.embeddings = get_embeddings()
         self.vector_store: Optional[FAISS] = None
         self.documents: List[Document] = []
+        # Per-process memo of query embeddings; repeated queries skip the
+        # embedding round-trip entirely (tuple so results are hashable)
+        self._embed_query_cached = functools.lru_cache(maxsize=1024)(
+            lambda query: tuple(self.embeddings.embed_query(query))
+        )
+        # Persistent cache so rebuilds only embed changed chunks
+        self._embed_cache = EmbeddingCache(
+            model=getattr(self.embeddings, "model", "text-embedding-ada-002")
+        )
+        # Chunks indexed by lowercased source file, maintained at ingest
+        # time so per-document lookups avoid scanning the full corpus
+        self._by_source: Dict[str, List[Document]] = defaultdict(list)
         
         # Create docs folder if it doesn't exist
         os.makedirs(docs_folder, exist_ok=True)
         os.makedirs(os.path.dirname(index_path), exist_ok=True)
         
-        # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        # Initialize text splitter (shared per configuration)
+        self.text_splitter = get_splitter(chunk_size, chunk_overlap)
     
     def load_pdfs(self) -> List[Document]:
         """Load all PDF files from the docs folder."""
         print(f"📂 Loading PDFs from {self.docs_folder}...")
         
-        # Find all PDF files
-        pdf_files = glob.glob(os.path.join(self.docs_folder, "*.pdf"))
+        # Find all PDF files (one scandir pass, stats included)
+        pdf_files = [path for path, _ in list_pdfs(self.docs_folder)]
         
         if not pdf_files:
             print(f"⚠️  No PDF files found in {self.docs_folder}")
             return []
         
         documents = []
-        for pdf_file in pdf_files:
+        # PDF parsing is CPU-bound, so multiple files are spread across
+        # worker processes; a single file stays in-process
+        if len(pdf_files) > 1:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=min(os.cpu_count() or 1, len(pdf_files))) as pool:
+                futures = {pdf_file: pool.submit(load_pdf, pdf_file)
+                           for pdf_file in pdf_files}
+                for pdf_file in pdf_files:
+                    try:
+                        pdf_docs = futures[pdf_file].result()
+                        documents.extend(pdf_docs)
+                        print(f"✅ Loaded {len(pdf_docs)} pages from {os.path.basename(pdf_file)}")
+                    except Exception as e:
+                        print(f"❌ Error loading {pdf_file}: {str(e)}")
+        else:
+            pdf_file = pdf_files[0]
             print(f"📄 Loading: {os.path.basename(pdf_file)}")
             try:
-                loader = PyPDFLoader(pdf_file)
-                pdf_docs = loader.load()
-                
-                # Add metadata
-                for doc in pdf_docs:
-                    doc.metadata.update({
-                        "source_file": os.path.basename(pdf_file),
-                        "file_path": pdf_file
-                    })
-                
-                documents.extend(pdf_docs)
-                print(f"✅ Loaded {len(pdf_docs)} pages from {os.path.basename(pdf_file)}")
-                
+                documents.extend(load_pdf(pdf_file))
             except Exception as e:
                 print(f"❌ Error loading {pdf_file}: {str(e)}")
         
@@ -94,13 +125,22 @@ class FAISSVectorStore:
         if os.path.exists(f"{self.index_path}.faiss") and not force_rebuild:
             print("📍 Loading existing FAISS index...")
             try:
-                self.vector_store = FAISS.load_local(
+                store = FAISS.load_local(
                     self.index_path, 
                     self.embeddings,
                     allow_dangerous_deserialization=True
                 )
-                print("✅ FAISS index loaded successfully")
-                return self.vector_store
+                # Indexes persisted by older code are L2 over unnormalized
+                # vectors: their distances aren't cosine similarities, and
+                # appending normalized vectors would mix metrics — rebuild
+                metric = getattr(store.index, "metric_type",
+                                 faiss.METRIC_INNER_PRODUCT)
+                if metric == faiss.METRIC_INNER_PRODUCT:
+                    self.vector_store = store
+                    print("✅ FAISS index loaded successfully")
+                    self._sync_with_docs_folder()
+                    return self.vector_store
+                print("⚠️  Existing index uses L2 distances; rebuilding in cosine space...")
             except Exception as e:
                 print(f"⚠️  Error loading existing index: {str(e)}")
                 print("🔄 Creating new index...")
@@ -119,42 +159,245 @@ class FAISSVectorStore:
             # Split documents into chunks
             chunks = self.split_documents(documents)
             self.documents = chunks
+            self._index_chunks(chunks)
             
-            # Create embeddings and vector store
+            # Create embeddings and vector store. Embedding explicitly in
+            # one batched call, then handing FAISS the precomputed vectors,
+            # avoids the wrapper's internal per-batch round-trips
             print("🧠 Creating embeddings and building FAISS index...")
-            self.vector_store = FAISS.from_documents(chunks, self.embeddings)
+            texts = [chunk.page_content for chunk in chunks]
+            embeddings = self._embed_texts(texts)
+            self.vector_store = self._build_vector_store(
+                texts, embeddings, [chunk.metadata for chunk in chunks]
+            )
         
         # Save the index
         print(f"💾 Saving FAISS index to {self.index_path}...")
         self.vector_store.save_local(self.index_path)
+        save_manifest(manifest_path(os.path.dirname(self.index_path)),
+                      scan_docs(self.docs_folder))
         print("✅ Vector store created and saved successfully")
         
         return self.vector_store
+
+    def _sync_with_docs_folder(self) -> None:
+        """Ingest PDFs that are new or changed since the index was saved.
+
+        FAISS can't delete vectors by metadata, so files removed from the
+        docs folder only disappear on a full rebuild.
+        """
+        path = manifest_path(os.path.dirname(self.index_path))
+        previous = load_manifest(path)
+        current = scan_docs(self.docs_folder)
+
+        # No manifest means a pre-built index shipped without one (or a
+        # pre-manifest index): diffing against nothing would re-ingest —
+        # and duplicate — every chunk already in it. Just record the
+        # snapshot and let future boots diff against that
+        if not previous:
+            save_manifest(path, current)
+            return
+
+        changed, _removed = diff_manifests(previous, current)
+
+        if not changed:
+            return
+
+        for name in changed:
+            self.add_document(current[name]["path"], flush=False)
+        self.flush()
+        save_manifest(path, current)
     
-    def similarity_search(self, query: str, k: int = 4, 
-                         score_threshold: float = 0.7) -> List[Dict[str, Any]]:
-        """Perform similarity search on the vector store."""
+    # HNSW graph parameters: 32 neighbors per node, with wider beams for
+    # graph construction and search
+    _HNSW_M = 32
+    _HNSW_EF_CONSTRUCTION = 200
+    _HNSW_EF_SEARCH = 64
+
+    # Corpora larger than this switch from HNSW to a trained IVF-PQ index
+    _IVF_THRESHOLD = 100_000
+
+    def _build_faiss_index(self, dim: int, n_vectors: int) -> faiss.Index:
+        """Build the ANN index backing the store.
+
+        IndexHNSWFlat searches in sublinear time with high recall, versus
+        the exact-but-linear IndexFlatL2 the wrapper would default to.
+        Past _IVF_THRESHOLD vectors, an IVF-PQ index (8-bit product
+        quantization) keeps memory roughly 16x smaller at a small recall
+        cost; it must be trained before vectors are added.
+        """
+        if n_vectors > self._IVF_THRESHOLD:
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFPQ(quantizer, dim, self.ivf_nlist,
+                                     self.pq_m, 8,
+                                     faiss.METRIC_INNER_PRODUCT)
+            index.nprobe = self.ivf_nprobe
+            return index
+
+        if self.quantization in ("fp16", "sq8"):
+            # Scalar-quantized HNSW: 16 or 8 bits per dimension instead
+            # of 32, halving or quartering the serialized index that
+            # save_local/load_local push through disk on cold starts;
+            # trained on the corpus before vectors are added
+            qtype = (faiss.ScalarQuantizer.QT_fp16
+                     if self.quantization == "fp16"
+                     else faiss.ScalarQuantizer.QT_8bit)
+            index = faiss.IndexHNSWSQ(dim, qtype, self._HNSW_M,
+                                      faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWFlat(dim, self._HNSW_M,
+                                        faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = self._HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = self._HNSW_EF_SEARCH
+        return index
+
+    def _build_vector_store(self, texts: List[str],
+                            embeddings: List[List[float]],
+                            metadatas: List[Dict[str, Any]]) -> FAISS:
+        """Assemble the FAISS wrapper around a custom-built index."""
+        vectors = np.asarray(embeddings, dtype="float32")
+        # Unit-normalized vectors make inner product equal cosine
+        # similarity, so search scores are directly interpretable
+        faiss.normalize_L2(vectors)
+        index = self._build_faiss_index(vectors.shape[1], len(vectors))
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+
+        ids = [str(uuid4()) for _ in texts]
+        docstore = InMemoryDocstore({
+            doc_id: Document(page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        })
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=dict(enumerate(ids))
+        )
+
+    def _add_texts_embedded(self, texts: List[str],
+                            metadatas: List[Dict[str, Any]]) -> None:
+        """Embed texts through the cache and add them to the index.
+
+        Going through _embed_texts (dedupe + persistent cache) instead of
+        langchain's add_texts means only genuinely new content hits the
+        embeddings API; vectors are normalized to match the
+        inner-product index.
+        """
+        embeddings = self._embed_texts(texts)
+        if self.vector_store is None:
+            self.vector_store = self._build_vector_store(texts, embeddings, metadatas)
+            return
+        vectors = np.asarray(embeddings, dtype="float32")
+        faiss.normalize_L2(vectors)
+        self.vector_store.add_embeddings(
+            list(zip(texts, vectors.tolist())), metadatas=metadatas
+        )
+
+    # Large corpora embed in sub-batches this big, with bounded fan-out
+    _EMBED_SUB_BATCH = 1000
+    _EMBED_CONCURRENCY = 8
+
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts through the persistent cache; only misses hit the API.
+
+        Identical chunks (repeated headers, footers, boilerplate) are
+        embedded once and the vector is scattered back to every position.
+        """
+        position_of: Dict[bytes, int] = {}
+        unique_texts: List[str] = []
+        positions = []
+        for text in texts:
+            digest = hashlib.sha256(text.encode()).digest()
+            index = position_of.setdefault(digest, len(unique_texts))
+            if index == len(unique_texts):
+                unique_texts.append(text)
+            positions.append(index)
+
+        vectors = self._embed_cache.get_or_compute(
+            unique_texts, self._embed_texts_uncached
+        )
+        return [vectors[index] for index in positions]
+
+    def _embed_texts_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, fanning large corpora out in concurrent sub-batches.
+
+        The fan-out runs on worker threads over the sync client: running
+        the shared async client on a private short-lived event loop would
+        strand its keep-alive connections on the closed loop and break
+        the next large ingest in the same process.
+        """
+        if len(texts) <= self._EMBED_SUB_BATCH:
+            return self.embeddings.embed_documents(texts)
+
+        batches = [texts[i:i + self._EMBED_SUB_BATCH]
+                   for i in range(0, len(texts), self._EMBED_SUB_BATCH)]
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self._EMBED_CONCURRENCY, len(batches))) as pool:
+            results = list(pool.map(self.embeddings.embed_documents, batches))
+        return [vector for batch in results for vector in batch]
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries in one batched embeddings API call."""
+        return self.embeddings.embed_documents(queries)
+
+    def similarity_search(self, query: str, k: int = 4,
+                         score_threshold: float = 0.7,
+                         where: Optional[Dict[str, Any]] = None,
+                         query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """Perform similarity search on the vector store.
+
+        An optional `where` metadata predicate (plain equality or the
+        Chroma-style {"$eq": value} form) is applied as a langchain FAISS
+        filter, with a wider fetch_k so filtering still returns k hits.
+        Callers that already hold the query embedding can pass it via
+        `query_embedding` to skip the per-query embedding round-trip.
+        """
         if not self.vector_store:
             raise ValueError("Vector store not initialized. Call create_vector_store() first.")
         
         print(f"🔍 Searching for: '{query}' (top {k} results)")
         
-        # Perform similarity search with scores
-        docs_with_scores = self.vector_store.similarity_search_with_score(query, k=k)
-        
+        # Perform similarity search with scores; the query embedding comes
+        # from the caller or the LRU memo, never a fresh per-call embed.
+        # Query vectors are normalized to match the unit vectors in the index
+        if query_embedding is None:
+            query_embedding = self._embed_query_cached(query)
+        query_vector = np.asarray(query_embedding,
+                                  dtype="float32").reshape(1, -1)
+        faiss.normalize_L2(query_vector)
+        search_kwargs: Dict[str, Any] = {"k": k}
+        if where:
+            # langchain's FAISS filter matches on plain equality, so the
+            # Chroma-style {"$eq": value} operator form is unwrapped; it
+            # post-filters, hence the wider fetch_k
+            search_kwargs["filter"] = {
+                key: value["$eq"] if isinstance(value, dict) and "$eq" in value
+                else value
+                for key, value in where.items()
+            }
+            search_kwargs["fetch_k"] = max(k * 4, 20)
+        docs_with_scores = self.vector_store.similarity_search_with_score_by_vector(
+            query_vector[0].tolist(), **search_kwargs
+        )
+
+        # Inner product over unit vectors is cosine similarity, so the
+        # scores need no conversion — just a vectorized threshold
         results = []
-        for doc, score in docs_with_scores:
-            # Convert FAISS distance to similarity score (lower distance = higher similarity)
-            similarity_score = 1 / (1 + score)
-            
-            if similarity_score >= score_threshold:
-                result = {
+        if docs_with_scores:
+            similarities = np.fromiter(
+                (score for _, score in docs_with_scores),
+                dtype=np.float64, count=len(docs_with_scores)
+            )
+            for i in np.flatnonzero(similarities >= score_threshold):
+                doc, score = docs_with_scores[i]
+                results.append({
                     "content": doc.page_content,
                     "metadata": doc.metadata,
-                    "similarity_score": similarity_score,
-                    "distance": score
-                }
-                results.append(result)
+                    "similarity_score": float(score),
+                    "distance": float(score)
+                })
         
         print(f"📋 Found {len(results)} relevant documents")
         return results
@@ -180,45 +423,127 @@ class FAISSVectorStore:
             stats["num_source_files"] = len(source_files)
         
         return stats
+
+    def source_chunk_count(self, source_file: str) -> int:
+        """Number of chunks indexed for a source file (O(1) lookup)."""
+        counted = self._by_source.get(source_file.lower())
+        if counted is None:
+            return len(self.get_chunks_by_source(source_file))
+        return len(counted)
+
+    def _index_chunks(self, chunks: List[Document]) -> None:
+        """Record chunks in the per-source index for fast lookups."""
+        for chunk in chunks:
+            source = chunk.metadata.get("source_file")
+            if source:
+                self._by_source[source.lower()].append(chunk)
+
+    def get_chunks_by_source(self, source_file: str,
+                             limit: Optional[int] = None) -> List[Document]:
+        """Fetch all chunks for a source file from the per-source index.
+
+        Falls back to scanning the docstore for indexes loaded from disk,
+        where the in-memory document list and index are empty.
+        """
+        chunks = self._by_source.get(source_file.lower())
+        if chunks is None and self.vector_store:
+            chunks = [
+                doc for doc in self.vector_store.docstore._dict.values()
+                if doc.metadata.get("source_file", "").lower() == source_file.lower()
+            ]
+        chunks = chunks or []
+        return chunks[:limit] if limit else chunks
     
-    def add_document(self, file_path: str) -> bool:
-        """Add a single document to the vector store."""
+    def add_document(self, file_path: str, flush: bool = True) -> bool:
+        """Add a single document to the vector store.
+
+        Bulk loaders can pass flush=False and call flush() once at the
+        end instead of rewriting the index after every file.
+        """
         try:
             print(f"📄 Adding document: {file_path}")
             
-            # Load the document
-            loader = PyPDFLoader(file_path)
-            docs = loader.load()
-            
-            # Add metadata
-            for doc in docs:
-                doc.metadata.update({
-                    "source_file": os.path.basename(file_path),
-                    "file_path": file_path
-                })
+            # Load the document (load_pdf tags source metadata)
+            docs = load_pdf(file_path)
             
             # Split into chunks
             chunks = self.text_splitter.split_documents(docs)
             
-            # Add to existing vector store or create new one
-            if self.vector_store:
-                # Add to existing store
-                texts = [chunk.page_content for chunk in chunks]
-                metadatas = [chunk.metadata for chunk in chunks]
-                self.vector_store.add_texts(texts, metadatas)
-            else:
-                # Create new store
-                self.vector_store = FAISS.from_documents(chunks, self.embeddings)
+            # Add through the embedding cache (creates the store when
+            # missing)
+            self._add_texts_embedded(
+                [chunk.page_content for chunk in chunks],
+                [chunk.metadata for chunk in chunks]
+            )
             
-            # Update documents list
+            # Update documents list and source index
             self.documents.extend(chunks)
+            self._index_chunks(chunks)
             
-            # Save updated index
-            self.vector_store.save_local(self.index_path)
+            # Save updated index (deferred when the caller batches adds)
+            if flush:
+                self.vector_store.save_local(self.index_path)
             
             print(f"✅ Successfully added {len(chunks)} chunks from {os.path.basename(file_path)}")
             return True
-            
+
         except Exception as e:
             print(f"❌ Error adding document {file_path}: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+
+    # Chunks are added to the index in slices this large; larger slices
+    # amortize per-call overhead without holding too much in flight
+    _ADD_BATCH = 1000
+
+    def flush(self) -> None:
+        """Write the index to disk after a series of deferred adds."""
+        if self.vector_store:
+            self.vector_store.save_local(self.index_path)
+
+    def add_documents(self, file_paths: List[str],
+                      batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """Add several documents in one pass, saving the index once.
+
+        Chunks from all files are embedded in `batch_size` slices and the
+        index is written to disk a single time at the end, instead of one
+        embed-and-save cycle per file.
+        """
+        batch_size = batch_size or self._ADD_BATCH
+        added = []
+        failed = []
+        all_chunks: List[Document] = []
+
+        for file_path in file_paths:
+            try:
+                print(f"📄 Loading document: {file_path}")
+                all_chunks.extend(
+                    self.text_splitter.split_documents(load_pdf(file_path))
+                )
+                added.append(os.path.basename(file_path))
+
+            except Exception as e:
+                print(f"❌ Error loading document {file_path}: {str(e)}")
+                failed.append({"file": os.path.basename(file_path), "error": str(e)})
+
+        if all_chunks:
+            print(f"🧠 Embedding {len(all_chunks)} chunks in batches of {batch_size}...")
+            for start in range(0, len(all_chunks), batch_size):
+                batch = all_chunks[start:start + batch_size]
+                self._add_texts_embedded(
+                    [chunk.page_content for chunk in batch],
+                    [chunk.metadata for chunk in batch]
+                )
+
+            self.documents.extend(all_chunks)
+            self._index_chunks(all_chunks)
+
+            # Save once for the whole batch
+            self.vector_store.save_local(self.index_path)
+            print(f"✅ Successfully added {len(all_chunks)} chunks from {len(added)} file(s)")
+
+        return {
+            "success": not failed,
+            "added": added,
+            "failed": failed,
+            "total_chunks": len(all_chunks)
+        } 
\ No newline at end of file
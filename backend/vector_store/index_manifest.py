@@ -0,0 +1,75 @@
+"""Docs-folder manifest for incremental index updates.
+
+Records (mtime, size) per source PDF alongside the index so a restart
+can diff the docs folder against what the index already contains and
+only re-ingest what actually changed.
+"""
+import json
+import os
+from typing import Dict, List, Tuple
+
+
+def manifest_path(index_dir: str) -> str:
+    """Path of the manifest stored next to an index."""
+    return os.path.join(index_dir, "manifest.json")
+
+
+def load_manifest(path: str) -> Dict[str, Dict]:
+    """Load a saved manifest, or an empty one if missing/corrupt."""
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path: str, entries: Dict[str, Dict]) -> None:
+    """Persist the manifest atomically (write then rename)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(entries, fh)
+    os.replace(tmp_path, path)
+
+
+def list_pdfs(docs_folder: str) -> List[Tuple[str, os.stat_result]]:
+    """List the folder's PDFs with their stat results in one pass.
+
+    os.scandir surfaces each entry's stat from the directory read
+    itself, so callers get file metadata without a second stat() call
+    per file. Results are sorted by path for deterministic ordering.
+    """
+    entries = []
+    try:
+        with os.scandir(docs_folder) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.lower().endswith(".pdf"):
+                    entries.append((entry.path, entry.stat()))
+    except FileNotFoundError:
+        pass
+    entries.sort(key=lambda pair: pair[0])
+    return entries
+
+
+def scan_docs(docs_folder: str) -> Dict[str, Dict]:
+    """Snapshot the docs folder: basename -> path, mtime and size."""
+    return {
+        os.path.basename(path): {
+            "path": path,
+            "mtime": stat.st_mtime,
+            "size": stat.st_size
+        }
+        for path, stat in list_pdfs(docs_folder)
+    }
+
+
+def diff_manifests(previous: Dict[str, Dict],
+                   current: Dict[str, Dict]) -> Tuple[List[str], List[str]]:
+    """Return (new or changed, removed) basenames between two snapshots."""
+    changed = [
+        name for name, entry in current.items()
+        if name not in previous
+        or previous[name].get("mtime") != entry["mtime"]
+        or previous[name].get("size") != entry["size"]
+    ]
+    removed = [name for name in previous if name not in current]
+    return changed, removed
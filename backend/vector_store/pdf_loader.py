@@ -0,0 +1,51 @@
+"""PDF loading helpers shared by the vector stores.
+
+load_pdf lives at module level so it can be dispatched to worker
+processes: PDF parsing is CPU-bound and holds the GIL, so threads
+don't help but separate processes do.
+
+PyMuPDF (fitz) parses pages several times faster than pypdf, so it's
+the preferred backend when installed; PyPDFLoader remains the fallback.
+"""
+import os
+from typing import List
+
+from langchain.document_loaders import PyPDFLoader
+from langchain.schema import Document
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+
+def load_pdf(file_path: str) -> List[Document]:
+    """Load one PDF and tag its pages with source metadata."""
+    if fitz is not None:
+        pages = _load_with_pymupdf(file_path)
+    else:
+        loader = PyPDFLoader(file_path)
+        pages = loader.load()
+
+    for page in pages:
+        page.metadata.update({
+            "source_file": os.path.basename(file_path),
+            "file_path": file_path
+        })
+    return pages
+
+
+def _load_with_pymupdf(file_path: str) -> List[Document]:
+    """Stream pages out of PyMuPDF, one Document per page.
+
+    Matches PyPDFLoader's metadata shape ("source" and zero-based
+    "page") so downstream chunk metadata is unchanged.
+    """
+    documents = []
+    with fitz.open(file_path) as pdf:
+        for page_number, page in enumerate(pdf):
+            documents.append(Document(
+                page_content=page.get_text(),
+                metadata={"source": file_path, "page": page_number}
+            ))
+    return documents
@@ -0,0 +1,15 @@
+"""Gunicorn configuration for production deployments.
+
+Run with: gunicorn -c gunicorn.conf.py api:app
+(or api_chroma:app for the ChromaDB variant)
+"""
+import os
+
+chdir = "backend"
+bind = "0.0.0.0:8000"
+# Single worker by default: the app keeps tasks, reports, sessions and
+# response caches in-process, and every worker builds its own vector
+# store. Raise API_WORKERS only once that state lives out-of-process
+workers = int(os.getenv("API_WORKERS", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+keepalive = 5